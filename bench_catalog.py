@@ -0,0 +1,47 @@
+import argparse
+import time
+
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+
+def measure(function) -> float:
+    """ Returns the seconds the function takes """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares validated and trusted catalog construction")
+    parser.add_argument("--products", type=int, default=200_000)
+    args = parser.parse_args()
+
+    count = args.products
+    product_rows = [(f"Product {index}", 10 + index % 100, 100) for index in range(count)]
+    non_stocked_rows = [(name, price) for name, price, _ in product_rows]
+    limited_rows = [(name, price, quantity, 5) for name, price, quantity in product_rows]
+
+    cases = [
+        ("Product", lambda: [Product(*row) for row in product_rows],
+         lambda: Product.bulk_from_trusted(product_rows)),
+        ("NonStockedProduct", lambda: [NonStockedProduct(*row) for row in non_stocked_rows],
+         lambda: NonStockedProduct.bulk_from_trusted(non_stocked_rows)),
+        ("LimitedProduct", lambda: [LimitedProduct(*row) for row in limited_rows],
+         lambda: LimitedProduct.bulk_from_trusted(limited_rows)),
+    ]
+    for name, validated, trusted in cases:
+        validated_seconds = measure(validated)
+        trusted_seconds = measure(trusted)
+        print(f"{name:18} validated {validated_seconds:.3f}s, trusted {trusted_seconds:.3f}s, "
+              f"{validated_seconds / trusted_seconds:.1f}x faster")
+
+    products = Product.bulk_from_trusted(product_rows)
+    validated_seconds = measure(lambda: Store(list(products)))
+    products = Product.bulk_from_trusted(product_rows)
+    trusted_seconds = measure(lambda: Store(list(products), validate=False))
+    print(f"{'Store':18} validated {validated_seconds:.3f}s, trusted {trusted_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
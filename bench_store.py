@@ -0,0 +1,62 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import PercentDiscountPromotion
+from sqlite_store import SQLiteStore
+from store import Store
+
+
+def build_products(count: int) -> list[Product]:
+    """ Builds a catalog with all three product types, every tenth product has a promotion """
+    discount = PercentDiscountPromotion(10)
+    products = []
+    for index in range(count):
+        if index % 10 == 0:
+            product = NonStockedProduct(f"Product {index}", 5 + index % 100)
+        elif index % 10 == 1:
+            product = LimitedProduct(f"Product {index}", 5 + index % 100, 1_000_000, 5)
+        else:
+            product = Product(f"Product {index}", 5 + index % 100, 1_000_000)
+        if index % 10 == 2:
+            product.set_promotion(discount)
+        products.append(product)
+    return products
+
+
+def run_orders(store, products: list[Product], orders: int, lines: int, seed: int) -> float:
+    """ Places random orders and returns the elapsed seconds """
+    rng = random.Random(seed)
+    shopping_lists = [[(rng.choice(products), rng.randint(1, 3)) for _ in range(lines)] for _ in range(orders)]
+    start = time.perf_counter()
+    for shopping_list in shopping_lists:
+        store.order(shopping_list)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares Store.order with SQLiteStore.order")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=3, help="lines per order")
+    args = parser.parse_args()
+
+    memory_products = build_products(args.products)
+    memory_seconds = run_orders(Store(memory_products), memory_products, args.orders, args.lines, 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, "store.db"))
+        sqlite_products = build_products(args.products)
+        store.add_products(sqlite_products)
+        sqlite_seconds = run_orders(store, sqlite_products, args.orders, args.lines, 1)
+        store.close()
+
+    for name, seconds in (("Store", memory_seconds), ("SQLiteStore", sqlite_seconds)):
+        print(f"{name:12} {args.orders} orders in {seconds:.3f}s, {args.orders / seconds:.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
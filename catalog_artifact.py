@@ -0,0 +1,105 @@
+import marshal
+from typing import List
+
+from products import Product, NonStockedProduct, LimitedProduct, paused_gc
+
+ARTIFACT_FORMAT = "best-buy-catalog"
+ARTIFACT_VERSION = 1 # increase when the layout of the artifact changes
+
+PRODUCT_TYPES = {
+    "Product": Product,
+    "NonStockedProduct": NonStockedProduct,
+    "LimitedProduct": LimitedProduct,
+}
+
+
+def compile_catalog(products: List[Product], path: str, catalog_version: int = 1) -> None:
+    """
+    Writes the products to a catalog artifact that read_catalog loads without running the product constructors.
+    The artifact is a marshal file, so it should be compiled with the same Python version that reads it
+    :param products: List[Product]: The products, in store order
+    :param path: str: Path of the artifact file
+    :param catalog_version: int: Version of the catalog contents, returned by read_catalog_version
+    """
+    from promotion import promotion_to_spec
+
+    rows = {kind: ([], []) for kind in PRODUCT_TYPES} # kind -> (positions, rows)
+    active = [] # (position, active) of the products whose active flag differs from the default
+    promotions = [] # (position, promotion text)
+    for position, product in enumerate(products):
+        kind = type(product).__name__
+        if kind not in PRODUCT_TYPES:
+            raise ValueError(f"Cannot store product type {kind}")
+        positions, kind_rows = rows[kind]
+        positions.append(position)
+        if isinstance(product, NonStockedProduct):
+            kind_rows.append((product.name, product.price))
+            default_active = True
+        elif isinstance(product, LimitedProduct):
+            kind_rows.append((product.name, product.price, product.quantity, product.limit))
+            default_active = product.quantity != 0
+        else:
+            kind_rows.append((product.name, product.price, product.quantity))
+            default_active = product.quantity != 0
+        if product.active != default_active:
+            active.append((position, product.active))
+        if product.promotion is not None:
+            promotions.append((position, promotion_to_spec(product.promotion)))
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "catalog_version": catalog_version,
+        "size": len(products),
+        "products": {kind: (tuple(positions), tuple(kind_rows)) for kind, (positions, kind_rows) in rows.items()},
+        "active": tuple(active),
+        "promotions": tuple(promotions),
+    }
+    with open(path, "wb") as file:
+        file.write(marshal.dumps(artifact))
+
+
+def _load(path: str) -> dict:
+    """ Reads an artifact file and checks its format and version """
+    with open(path, "rb") as file:
+        data = file.read() # marshal.load reads a file in small pieces, loads of the whole file is much faster
+    try:
+        with paused_gc():
+            artifact = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        raise ValueError(f"{path} is not a catalog artifact")
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a catalog artifact")
+    if artifact.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Catalog artifact version {artifact.get('version')} is not supported, "
+                         f"expected {ARTIFACT_VERSION}")
+    return artifact
+
+
+def read_catalog_version(path: str) -> int:
+    """ Returns the catalog version an artifact was compiled with """
+    return _load(path)["catalog_version"]
+
+
+def read_catalog(path: str) -> List[Product]:
+    """
+    Creates the products of a catalog artifact
+    Products are created without the checks of their constructors, and the promotion module is only imported
+    if a product has a promotion
+    :param path: str: Path of the artifact file
+    :return: List[Product]: The products, in store order
+    """
+    artifact = _load(path)
+    products = [None] * artifact["size"]
+    for kind, (positions, rows) in artifact["products"].items():
+        for position, product in zip(positions, PRODUCT_TYPES[kind].bulk_from_trusted(rows)):
+            products[position] = product
+    for position, active in artifact["active"]:
+        products[position].active = active
+    if artifact["promotions"]:
+        from promotion import promotion_from_spec
+
+        created = {} # promotion text -> promotion, products with the same promotion share it
+        for position, spec in artifact["promotions"]:
+            products[position].promotion = promotion_from_spec(spec, created)
+    return products
@@ -0,0 +1,72 @@
+import sqlite3
+
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import promotion_to_spec, promotion_from_spec
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    max_limit INTEGER,
+    promotion TEXT
+)
+"""
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS products_price ON products (price)",
+    "CREATE INDEX IF NOT EXISTS products_active ON products (active)",
+)
+
+COLUMNS = "name, kind, price, quantity, active, max_limit, promotion"
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens a catalog database and creates the products table and its indexes if they do not exist.
+    Database files are switched to write-ahead logging, so readers in other processes do not block writers
+    :param path: str: Path of the database file, ":memory:" for a database that is not stored
+    :return: sqlite3.Connection: The connection, usable from every thread (callers must serialize access)
+    """
+    connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+    if path != ":memory:":
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(SCHEMA)
+    for index in INDEXES:
+        connection.execute(index)
+    connection.commit()
+    return connection
+
+
+def product_to_row(product: Product) -> tuple:
+    """ Returns the row stored for a product, in the order of COLUMNS """
+    quantity = 0 if isinstance(product, NonStockedProduct) else product.quantity
+    return (product.name, type(product).__name__, product.price, quantity, int(product.active),
+            getattr(product, "limit", None), promotion_to_spec(product.promotion))
+
+
+def product_from_row(row: tuple, promotions: dict) -> Product:
+    """
+    Creates a product from a stored row
+    :param row: tuple: The row, in the order of COLUMNS
+    :param promotions: dict: Already created promotions by their text, see promotion_from_spec
+    :return: Product: The product
+    """
+    name, kind, price, quantity, active, limit, spec = row
+    if price.is_integer():
+        price = int(price)
+    # rows are written from valid products only, so the checks of the constructors can be skipped
+    if kind == "NonStockedProduct":
+        product = NonStockedProduct.from_trusted(name, price)
+    elif kind == "LimitedProduct":
+        product = LimitedProduct.from_trusted(name, price, quantity, limit)
+    elif kind == "Product":
+        product = Product.from_trusted(name, price, quantity)
+    else:
+        raise ValueError(f"Unknown product type {kind}")
+    product.active = bool(active)
+    product.promotion = promotion_from_spec(spec, promotions)
+    return product
@@ -0,0 +1,198 @@
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, List
+
+QUANTITY_CHANGED = "quantity_changed"
+PRICE_CHANGED = "price_changed"
+ACTIVATED = "activated"
+DEACTIVATED = "deactivated"
+PRODUCT_ADDED = "product_added"
+PRODUCT_REMOVED = "product_removed"
+PROMOTION_CHANGED = "promotion_changed"
+LIMIT_CHANGED = "limit_changed"
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeEvent:
+    __slots__ = ("sequence", "kind", "product", "old_value", "new_value")
+
+    def __init__(self, sequence: int, kind: str, product: "Product", old_value=None, new_value=None) -> None:
+        """
+        Constructor for the ChangeEvent class
+        :param sequence: int: Position of the event in the feed, starting at 1
+        :param kind: str: One of the event kinds defined in this module
+        :param product: Product: The product that changed
+        :param old_value: Value before the change (quantity, price, active flag, promotion or limit), None for
+        added/removed products
+        :param new_value: Value after the change (quantity, price, active flag, promotion or limit), None for
+        added/removed products
+        """
+        self.sequence = sequence
+        self.kind = kind
+        self.product = product
+        self.old_value = old_value
+        self.new_value = new_value
+
+    def __repr__(self) -> str:
+        """ Returns the string representation of the event """
+        return (f"ChangeEvent({self.sequence}, {self.kind}, {self.product.name}, "
+                f"{self.old_value!r} -> {self.new_value!r})")
+
+
+class AsyncSubscription:
+    def __init__(self, feed: "ChangeFeed", loop: "asyncio.AbstractEventLoop", max_batches: int) -> None:
+        """
+        Constructor for the AsyncSubscription class
+        Async iterator over the batches of a change feed. Batches that do not fit into the queue are dropped
+        and counted in missed_batches, the consumer can catch up with ChangeFeed.events_since
+        :param feed: ChangeFeed: The feed to subscribe to
+        :param loop: asyncio.AbstractEventLoop: The loop the consumer runs on
+        :param max_batches: int: Maximum number of undelivered batches kept for the consumer
+        """
+        import asyncio # imported on first use, it takes most of the import time of the store modules
+
+        self.feed = feed
+        self.loop = loop
+        self.queue = asyncio.Queue(max_batches)
+        self.queue_full = asyncio.QueueFull
+        self.missed_batches = 0
+        self.closed = False
+
+    def _deliver(self, batch: List[ChangeEvent] or None) -> None:
+        """ Puts the batch into the queue, called on the event loop """
+        try:
+            self.queue.put_nowait(batch)
+        except self.queue_full:
+            if batch is None:
+                # make sure the consumer still gets the end of the stream
+                self.queue.get_nowait()
+                self.queue.put_nowait(None)
+            self.missed_batches += 1
+
+    def __call__(self, batch: List[ChangeEvent]) -> None:
+        """ Receives a batch from the feed, may be called from any thread """
+        self.loop.call_soon_threadsafe(self._deliver, batch)
+
+    def __aiter__(self) -> "AsyncSubscription":
+        return self
+
+    async def __anext__(self) -> List[ChangeEvent]:
+        """ Waits for the next batch of events """
+        batch = await self.queue.get()
+        if batch is None:
+            raise StopAsyncIteration
+        return batch
+
+    def close(self) -> None:
+        """ Unsubscribes from the feed and ends the iteration """
+        if self.closed:
+            return
+        self.closed = True
+        self.feed.unsubscribe(self)
+        self.loop.call_soon_threadsafe(self._deliver, None)
+
+
+class ChangeFeed:
+    def __init__(self, capacity: int = 10_000, batch_size: int = 100) -> None:
+        """
+        Constructor for the ChangeFeed class
+        Keeps the latest events in a ring buffer and delivers them to subscribers in batches
+        :param capacity: int: Number of events kept in the ring buffer
+        :param batch_size: int: Maximum number of events delivered to subscribers at once
+        """
+        if not isinstance(capacity, int) or capacity <= 0:
+            raise ValueError("Capacity must be a positive integer")
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer")
+
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.events = deque(maxlen=capacity)
+        self.sequence = 0
+        self.subscribers = []
+        self.pending = []
+        self.batch_depth = 0
+        self.lock = threading.RLock()
+
+    def publish(self, kind: str, product: "Product", old_value=None, new_value=None) -> ChangeEvent:
+        """ Appends an event to the feed and delivers it unless a batch is open """
+        with self.lock:
+            self.sequence += 1
+            event = ChangeEvent(self.sequence, kind, product, old_value, new_value)
+            self.events.append(event)
+            if not self.subscribers:
+                return event
+            self.pending.append(event)
+            if self.batch_depth and len(self.pending) < self.batch_size:
+                return event
+        self.flush()
+        return event
+
+    def flush(self) -> None:
+        """
+        Delivers all pending events to the subscribers, in the order they were published
+        A failing subscriber is logged and skipped, the changes of the events are already made
+        """
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                for subscriber in self.subscribers:
+                    try:
+                        subscriber(batch)
+                    except Exception:
+                        logger.exception("Change feed subscriber %r failed", subscriber)
+
+    @contextmanager
+    def batch(self):
+        """ Holds back delivery until the outermost batch is closed, so subscribers get the changes at once """
+        with self.lock:
+            self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.batch_depth -= 1
+                done = self.batch_depth == 0
+            if done:
+                self.flush()
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None]) -> Callable[[List[ChangeEvent]], None]:
+        """ Registers a callback receiving every batch of events and returns it """
+        with self.lock:
+            self.subscribers.append(callback)
+        return callback
+
+    def subscribe_async(self, loop: "asyncio.AbstractEventLoop" = None, max_batches: int = 1000) -> AsyncSubscription:
+        """ Returns an async iterator over batches of events, must be called on the consumer loop if no loop is given """
+        import asyncio
+
+        subscription = AsyncSubscription(self, loop or asyncio.get_running_loop(), max_batches)
+        self.subscribe(subscription)
+        return subscription
+
+    def unsubscribe(self, callback: Callable[[List[ChangeEvent]], None]) -> None:
+        """ Removes a subscriber """
+        with self.lock:
+            if callback not in self.subscribers:
+                raise ValueError("Callback is not subscribed")
+            self.subscribers.remove(callback)
+
+    def events_since(self, sequence: int) -> List[ChangeEvent]:
+        """ Returns all events after the given sequence number, for consumers catching up """
+        with self.lock:
+            missing = self.sequence - sequence
+            if missing > len(self.events):
+                raise ValueError("Events since this sequence were already evicted from the feed")
+            if missing <= 0:
+                return []
+            return list(islice(self.events, len(self.events) - missing, None))
+
+    def __len__(self) -> int:
+        """ Returns the number of events in the ring buffer """
+        return len(self.events)
@@ -0,0 +1,228 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Iterator, List
+
+import catalog_db
+from products import Product, LimitedProduct
+
+WRITE_PRODUCT = (f"INSERT INTO products ({catalog_db.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                 "ON CONFLICT(name) DO UPDATE SET "
+                 + ", ".join(f"{column} = excluded.{column}" for column in catalog_db.COLUMNS.split(", ")[1:]))
+
+
+class LazyStore:
+    def __init__(self, path: str, cache_size: int = 10_000) -> None:
+        """
+        Constructor for the LazyStore class
+        Store that keeps its catalog in an SQLite file and only keeps the recently used products in memory.
+        Products are created when they are first needed and kept in an LRU cache, changed products are
+        written back when they are evicted or when flush is called. A product evicted while the caller still
+        holds it stays the product of its name: its later changes are written back by the next flush and
+        get_product returns the same object again
+        :param path: str: Path of the catalog database
+        :param cache_size: int: Maximum number of products kept in memory
+        """
+        if not isinstance(cache_size, int) or cache_size <= 0:
+            raise ValueError("Cache size must be a positive integer")
+
+        self.connection = catalog_db.connect(path)
+        self.cache_size = cache_size
+        self.cache = OrderedDict() # name -> product, least recently used first
+        self.dirty = {} # name -> product changed since it was written
+        self.evicted = weakref.WeakValueDictionary() # name -> evicted product that is still used elsewhere
+        self.promotions = {} # promotion text -> promotion, shared by all products
+        self.lock = threading.RLock()
+
+    def _on_product_change(self, kind: str, product: Product, old_value, new_value) -> None:
+        """ Marks a product for write back """
+        with self.lock:
+            self.dirty[product.name] = product
+
+    def _write(self, products: List[Product]) -> None:
+        """ Writes products to the database """
+        # an upsert keeps the rowid of existing rows, so written back products keep their place in iter_products
+        self.connection.executemany(WRITE_PRODUCT, [catalog_db.product_to_row(product) for product in products])
+
+    def _evict(self) -> None:
+        """ Evicts the least recently used products until the cache fits, writing back the changed ones """
+        evicted = []
+        while len(self.cache) > self.cache_size:
+            name, product = self.cache.popitem(last=False)
+            # the observer stays, so changes made by callers still holding the product are written back
+            self.evicted[name] = product
+            if self.dirty.pop(name, None) is not None:
+                evicted.append(product)
+        if evicted:
+            self._write(evicted)
+            self.connection.commit()
+
+    def _load(self, name: str) -> Product or None:
+        """ Returns the cached product with the name, loading it from the database if needed """
+        product = self.cache.get(name)
+        if product is not None:
+            self.cache.move_to_end(name)
+            return product
+        product = self.evicted.pop(name, None)
+        if product is not None:
+            self.cache[name] = product
+            self._evict()
+            return product
+        row = self.connection.execute(f"SELECT {catalog_db.COLUMNS} FROM products WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        product = catalog_db.product_from_row(row, self.promotions)
+        product.add_observer(self._on_product_change)
+        self.cache[name] = product
+        self._evict()
+        return product
+
+    def add_product(self, product: Product) -> None:
+        """ Adds a product to the store """
+        if not isinstance(product, Product):
+            raise ValueError("Product must be of type Product")
+        with self.lock:
+            if product.name in self:
+                raise ValueError("Product already exists in the store")
+            self._write([product])
+            self.connection.commit()
+
+    def remove_product(self, product: Product) -> None:
+        """ Removes a product from the store """
+        if not isinstance(product, Product):
+            raise ValueError("Product must be of type Product")
+        with self.lock:
+            if product.name not in self:
+                raise ValueError("Product does not exist in the store")
+            for cached in (self.cache.pop(product.name, None), self.evicted.pop(product.name, None)):
+                if cached is not None:
+                    cached.remove_observer(self._on_product_change)
+            self.dirty.pop(product.name, None)
+            self.connection.execute("DELETE FROM products WHERE name = ?", (product.name,))
+            self.connection.commit()
+
+    def get_product(self, name: str) -> Product or None:
+        """ Returns the product with the given name, or None if the store has no such product """
+        with self.lock:
+            return self._load(name)
+
+    def flush(self) -> None:
+        """ Writes all changed products back to the database """
+        with self.lock:
+            if self.dirty:
+                self._write(list(self.dirty.values()))
+                self.dirty.clear()
+            self.connection.commit()
+
+    def get_total_quantity(self) -> int:
+        """ Returns the total quantity of all stocked products in the store """
+        with self.lock:
+            self.flush()
+            return self.connection.execute(
+                "SELECT COALESCE(SUM(quantity), 0) FROM products WHERE kind != 'NonStockedProduct'").fetchone()[0]
+
+    def iter_products(self, chunk_size: int = 1000) -> Iterator[Product]:
+        """
+        Iterates over all active products without filling the cache
+        Rows are read chunk_size at a time, the lock is only held while a chunk is read. Products that are not
+        in memory are created only for the iteration, changing them is not stored
+        :param chunk_size: int: Number of rows read at once
+        """
+        with self.lock:
+            self.flush()
+        last_rowid = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT rowid, {catalog_db.COLUMNS} FROM products WHERE active = 1 AND rowid > ? "
+                    "ORDER BY rowid LIMIT ?", (last_rowid, chunk_size)).fetchall()
+                products = [self.cache.get(row[1]) or self.evicted.get(row[1]) for row in rows]
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for row, product in zip(rows, products):
+                yield product if product is not None else catalog_db.product_from_row(row[1:], self.promotions)
+
+    def get_all_products(self) -> List[Product]:
+        """ Returns all active products in the store, this creates every product, see iter_products """
+        return list(self.iter_products())
+
+    def quote(self, shopping_list: list[tuple[Product, int]]) -> float:
+        """
+        Returns the cost of an order without buying anything
+        :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :return: float: Total cost of the order
+        """
+        total_cost = 0
+        with self.lock:
+            for product, quantity in shopping_list:
+                shop_product = self._load(product.name) if isinstance(product, Product) else None
+                if shop_product is None:
+                    raise ValueError("Product does not exist in the store")
+                if not shop_product.is_active():
+                    raise ValueError("Product is not active")
+                total_cost += shop_product.quote(quantity)
+        return total_cost
+
+    def order(self, shopping_list: list[tuple[Product, int]], customer=None, failures: list = None) -> float:
+        """
+        Orders products from the store, the products are looked up by name
+        :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :param customer: Hashable: Accepted for compatibility with Store.order, purchase limiters are not stored
+        in the database so there are no per customer limits
+        :param failures: list: Optional list, (product, error message) is appended to it for every line that could
+        not be bought, including lines with unknown or inactive products. Without it these lines are printed and
+        an unknown or inactive product raises an error
+        :return: float: Total cost of the order
+        """
+        total_cost = 0
+        limited_quantities = {} # quantities of limited products already bought in this order, by name
+        with self.lock:
+            for product, quantity in shopping_list:
+                shop_product = self._load(product.name) if isinstance(product, Product) else None
+                if shop_product is None:
+                    if failures is None:
+                        raise ValueError("Product does not exist in the store")
+                    failures.append((product, "Product does not exist in the store"))
+                    continue
+                if not shop_product.is_active():
+                    if failures is None:
+                        raise ValueError("Product is not active")
+                    failures.append((shop_product, "Product is not active"))
+                    continue
+
+                try:
+                    if isinstance(shop_product, LimitedProduct):
+                        already_bought = limited_quantities.get(shop_product.name, 0)
+                        shop_product.check_order_limit(quantity, already_bought)
+                        total_cost += shop_product.buy(quantity, customer)
+                        limited_quantities[shop_product.name] = already_bought + quantity
+                    else:
+                        total_cost += shop_product.buy(quantity)
+                except ValueError as e:
+                    if failures is None:
+                        print(f"Error buying {shop_product}: {e}")
+                    else:
+                        failures.append((shop_product, str(e)))
+
+        return total_cost
+
+    def close(self) -> None:
+        """ Writes all changed products back and closes the database """
+        with self.lock:
+            self.flush()
+            self.connection.close()
+
+    def __contains__(self, item) -> bool:
+        """ Checks if a product (or a product name) is in the store """
+        name = item.name if isinstance(item, Product) else item
+        with self.lock:
+            if name in self.cache:
+                return True
+            return self.connection.execute("SELECT 1 FROM products WHERE name = ?", (name,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        """ Returns the number of products in the store """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
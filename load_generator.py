@@ -0,0 +1,94 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """ Returns the percentile of already sorted values, 0 for no values """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def run_client(host: str, port: int, requests: int, order_ratio: float, seed: int, latencies: list[float],
+               errors: list[str]) -> None:
+    """ Sends requests over one keep-alive connection and appends the latencies in seconds """
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        connection.request("GET", "/products")
+        products = json.loads(connection.getresponse().read())["products"]
+        for _ in range(requests):
+            start = time.perf_counter()
+            if products and rng.random() < order_ratio:
+                product = rng.choice(products)
+                body = json.dumps({"items": [{"product": product["name"], "quantity": 1}]})
+                connection.request("POST", "/order", body, {"Content-Type": "application/json"})
+            else:
+                connection.request("GET", "/products")
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            if response.status != 200:
+                errors.append(f"HTTP {response.status}")
+    except (OSError, http.client.HTTPException) as e:
+        errors.append(str(e))
+    finally:
+        connection.close()
+
+
+def run_load(host: str, port: int, clients: int, requests: int, order_ratio: float) -> dict:
+    """
+    Benchmarks a running store server
+    :param host: str: Host of the server
+    :param port: int: Port of the server
+    :param clients: int: Number of concurrent clients, each with its own keep-alive connection
+    :param requests: int: Number of requests per client
+    :param order_ratio: float: Share of requests that are orders, the rest list the products
+    :return: dict: Requests, errors, seconds, requests per second and latency percentiles in milliseconds
+    """
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=run_client,
+                                args=(host, port, requests, order_ratio, seed, latencies, errors))
+               for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the store HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per client")
+    parser.add_argument("--order-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    report = run_load(args.host, args.port, args.clients, args.requests, args.order_ratio)
+    print(f"{report['requests']} requests ({report['errors']} errors) in {report['seconds']:.2f}s, "
+          f"{report['requests_per_second']:.0f} req/s, p50 {report['p50_ms']:.2f}ms, "
+          f"p95 {report['p95_ms']:.2f}ms, p99 {report['p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
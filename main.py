@@ -1,13 +1,30 @@
+import time
+
+STARTED = time.perf_counter() # the startup report measures the imports below from here
+
+import argparse
+import json
+import sys
+
+from order_requests import execute_order
 from products import Product, LimitedProduct, NonStockedProduct
-import promotion
 from store import Store
 
+IMPORTED = time.perf_counter()
+
 
 SEPARATOR = "-" * 10
 
 
 def initialize_best_buy() -> Store:
     """ Initializes the Best Buy store """
+    return Store(best_buy_products())
+
+
+def best_buy_products() -> list[Product]:
+    """ Creates the products of the Best Buy store """
+    import promotion # only needed when the catalog is built here instead of read from an artifact
+
     # setup initial stock of inventory
     product_list = [Product("MacBook Air M2", price=1450, quantity=100),
                     Product("Bose QuietComfort Earbuds", price=250, quantity=500),
@@ -25,7 +42,35 @@ def initialize_best_buy() -> Store:
     product_list[0].set_promotion(second_half_price)
     product_list[1].set_promotion(third_one_free)
     product_list[3].set_promotion(thirty_percent)
-    return Store(product_list)
+    return product_list
+
+
+def startup(catalog_path: str or None, phases: list[tuple[str, float]]) -> Store:
+    """
+    Creates the store, from a catalog artifact if a path is given, and appends the time of every phase to phases
+    :param catalog_path: str or None: Path of a catalog artifact compiled with --compile-catalog
+    :param phases: list[tuple[str, float]]: Receives (phase name, seconds) of the catalog and store phases
+    :return: Store: The store
+    """
+    start = time.perf_counter()
+    if catalog_path is None:
+        products = best_buy_products()
+    else:
+        from catalog_artifact import read_catalog
+
+        products = read_catalog(catalog_path)
+    catalog_done = time.perf_counter()
+    # products read from an artifact were valid when it was compiled
+    store = Store(products, validate=catalog_path is None)
+    phases.append(("catalog", catalog_done - start))
+    phases.append(("store", time.perf_counter() - catalog_done))
+    return store
+
+
+def startup_report(phases: list[tuple[str, float]]) -> str:
+    """ Returns a line with the milliseconds spent in every startup phase and in total """
+    timings = [f"{name} {seconds * 1000:.2f}ms" for name, seconds in phases]
+    return f"Startup: {', '.join(timings)}, total {sum(seconds for _, seconds in phases) * 1000:.2f}ms"
 
 
 def list_all_products_command(store: Store) -> list[Product]:
@@ -144,9 +189,103 @@ def show_menu(store: Store) -> None:
         option["function"](store)
 
 
+def execute_order_line(store: Store, line_number: int, line: str) -> dict:
+    """ Executes one JSON line of a batch file and returns its result """
+    try:
+        order = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"line": line_number, "error": f"Invalid JSON: {e}"}
+    return {"line": line_number, **execute_order(store, order)}
+
+
+def batch_command(store: Store, input_stream, output_stream, batch_size: int = 100,
+                  report_stream=sys.stderr) -> dict:
+    """
+    Runs orders from a JSONL stream without user interaction and writes one JSON result per order
+    :param store: Store: The store to order from
+    :param input_stream: Text stream with one JSON order per line, empty lines are skipped
+    :param output_stream: Text stream the JSON results are written to
+    :param batch_size: int: Number of orders executed while holding the store lock and written at once
+    :param report_stream: Text stream the throughput report is written to, None to skip the report
+    :return: dict: Number of orders, failed orders, elapsed seconds and orders per second
+    """
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer")
+
+    orders = 0
+    failed = 0
+    start = time.perf_counter()
+    batch = []
+    for line_number, line in enumerate(input_stream, start=1):
+        if line.strip():
+            batch.append((line_number, line))
+        if len(batch) < batch_size:
+            continue
+        failed += run_batch(store, batch, output_stream)
+        orders += len(batch)
+        batch = []
+    if batch:
+        failed += run_batch(store, batch, output_stream)
+        orders += len(batch)
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "orders": orders,
+        "failed": failed,
+        "seconds": elapsed,
+        "orders_per_second": orders / elapsed if elapsed > 0 else 0.0
+    }
+    if report_stream is not None:
+        print(f"Processed {orders} orders ({failed} failed) in {elapsed:.3f}s, "
+              f"{report['orders_per_second']:.1f} orders/s", file=report_stream)
+    return report
+
+
+def run_batch(store: Store, batch: list[tuple[int, str]], output_stream) -> int:
+    """ Executes a batch of order lines, writes the results and returns the number of failed orders """
+    with store.lock:
+        results = [execute_order_line(store, line_number, line) for line_number, line in batch]
+    output_stream.write("".join(json.dumps(result) + "\n" for result in results))
+    output_stream.flush()
+    return sum(1 for result in results if "error" in result)
+
+
 def main():
-    best_buy = initialize_best_buy()
-    show_menu(best_buy)
+    parser = argparse.ArgumentParser(description="Best Buy store")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the orders of a JSONL file ('-' for stdin) instead of showing the menu")
+    parser.add_argument("--batch-size", type=int, default=100, help="orders executed per batch")
+    parser.add_argument("--output", metavar="FILE", help="write the batch results to FILE instead of stdout")
+    parser.add_argument("--catalog", metavar="FILE", help="load the store from a compiled catalog artifact")
+    parser.add_argument("--compile-catalog", metavar="FILE",
+                        help="write the built-in catalog to a catalog artifact and exit")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time spent in every startup phase to stderr")
+    args = parser.parse_args()
+
+    if args.compile_catalog is not None:
+        from catalog_artifact import compile_catalog
+
+        compile_catalog(best_buy_products(), args.compile_catalog)
+        return
+
+    phases = [("imports", IMPORTED - STARTED)]
+    best_buy = startup(args.catalog, phases)
+    if args.startup_report:
+        print(startup_report(phases), file=sys.stderr)
+    if args.batch is None:
+        show_menu(best_buy)
+        return
+
+    input_stream = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    output_stream = sys.stdout if args.output is None else open(args.output, "w", encoding="utf-8")
+    try:
+        batch_command(best_buy, input_stream, output_stream, args.batch_size)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+import time
+from array import array
+from typing import Callable, Iterator
+
+NO_PROMOTION = -1
+
+
+class OrderHistory:
+    def __init__(self, bucket_seconds: int = 3600, clock: Callable[[], float] = time.time) -> None:
+        """
+        Constructor for the OrderHistory class
+        Append-only history of all bought order lines, stored column by column in typed arrays.
+        Units and revenue per product and time bucket are added up while lines are recorded, so
+        queries over long time ranges only look at one entry per bucket
+        :param bucket_seconds: int: Length of the time buckets of the rollups in seconds
+        :param clock: Callable[[], float]: Function returning the current time in seconds
+        """
+        if not isinstance(bucket_seconds, int) or bucket_seconds <= 0:
+            raise ValueError("Bucket seconds must be a positive integer")
+
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.timestamps = array("d")
+        self.product_ids = array("I")
+        self.quantities = array("q")
+        self.prices_paid = array("d")
+        self.promotion_ids = array("i")
+        self.product_names = [] # product id -> name
+        self.product_index = {} # name -> product id
+        self.promotions = [] # promotion id -> promotion
+        self.promotion_index = {} # id(promotion) -> promotion id
+        self.rollups = {} # product id -> {bucket: [units, revenue]}
+
+    def _product_id(self, name: str) -> int:
+        """ Returns the id of a product name, adding it if it is new """
+        product_id = self.product_index.get(name)
+        if product_id is None:
+            product_id = len(self.product_names)
+            self.product_names.append(name)
+            self.product_index[name] = product_id
+            self.rollups[product_id] = {}
+        return product_id
+
+    def _promotion_id(self, promotion: "Promotion" or None) -> int:
+        """ Returns the id of a promotion, adding it if it is new """
+        if promotion is None:
+            return NO_PROMOTION
+        promotion_id = self.promotion_index.get(id(promotion))
+        if promotion_id is None:
+            promotion_id = len(self.promotions)
+            self.promotions.append(promotion) # keeps the promotion alive, so its id() is not reused
+            self.promotion_index[id(promotion)] = promotion_id
+        return promotion_id
+
+    def record(self, product: "Product", quantity: int, price_paid: float, timestamp: float = None) -> None:
+        """
+        Appends a bought order line
+        :param product: Product: The product that was bought
+        :param quantity: int: The quantity that was bought
+        :param price_paid: float: The total paid for the line
+        :param timestamp: float: Time of the order in seconds, the current time if None
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+        product_id = self._product_id(product.name)
+        self.timestamps.append(timestamp)
+        self.product_ids.append(product_id)
+        self.quantities.append(quantity)
+        self.prices_paid.append(price_paid)
+        self.promotion_ids.append(self._promotion_id(product.promotion))
+
+        buckets = self.rollups[product_id]
+        bucket = int(timestamp // self.bucket_seconds)
+        rollup = buckets.get(bucket)
+        if rollup is None:
+            buckets[bucket] = [quantity, price_paid]
+        else:
+            rollup[0] += quantity
+            rollup[1] += price_paid
+
+    def _buckets(self, product_name: str, start: float, end: float) -> Iterator[tuple[float, list]]:
+        """ Yields the start time and rollup of every bucket of the product between start and end """
+        product_id = self.product_index.get(product_name)
+        if product_id is None:
+            return
+        buckets = self.rollups[product_id]
+        first = int(start // self.bucket_seconds)
+        last = int(end // self.bucket_seconds)
+        if last - first + 1 > len(buckets):
+            # fewer buckets with sales than buckets in the range
+            numbers = sorted(number for number in buckets if first <= number <= last)
+        else:
+            numbers = (number for number in range(first, last + 1) if number in buckets)
+        for number in numbers:
+            yield number * self.bucket_seconds, buckets[number]
+
+    def units_sold(self, product_name: str, start: float, end: float) -> dict[float, int]:
+        """
+        Returns the units sold of a product per time bucket
+        :param product_name: str: Name of the product
+        :param start: float: Start of the time range in seconds, its whole bucket is included
+        :param end: float: End of the time range in seconds, its whole bucket is included
+        :return: dict[float, int]: Units sold by the start time of the bucket, buckets without sales are left out
+        """
+        return {bucket_start: rollup[0] for bucket_start, rollup in self._buckets(product_name, start, end)}
+
+    def revenue(self, product_name: str, start: float, end: float) -> dict[float, float]:
+        """ Returns the revenue of a product per time bucket, see units_sold """
+        return {bucket_start: rollup[1] for bucket_start, rollup in self._buckets(product_name, start, end)}
+
+    def lines(self, start_index: int = 0) -> Iterator[tuple[float, str, int, float, str or None]]:
+        """ Yields (timestamp, product name, quantity, price paid, promotion name) of the recorded lines """
+        for index in range(start_index, len(self.timestamps)):
+            promotion_id = self.promotion_ids[index]
+            yield (self.timestamps[index], self.product_names[self.product_ids[index]], self.quantities[index],
+                   self.prices_paid[index],
+                   None if promotion_id == NO_PROMOTION else str(self.promotions[promotion_id]))
+
+    def __len__(self) -> int:
+        """ Returns the number of recorded order lines """
+        return len(self.timestamps)
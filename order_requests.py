@@ -0,0 +1,69 @@
+from products import Product
+from store import Store
+
+
+def parse_order(store: Store, order: dict) -> tuple[list[tuple[Product, int]], object, object]:
+    """
+    Turns an order request into a shopping list
+    An order request looks like {"id": 1, "customer": "alice", "items": [{"product": "Google Pixel 7", "quantity": 2}]},
+    id and customer are optional
+    :param store: Store: The store to look the products up in
+    :param order: dict: The decoded order request
+    :return: tuple: The shopping list, the order id and the customer
+    """
+    if not isinstance(order, dict) or not isinstance(order.get("items"), list):
+        raise ValueError("Order must be an object with a list of items")
+
+    shopping_list = []
+    for item in order["items"]:
+        if not isinstance(item, dict):
+            raise ValueError("Item must be an object with product and quantity")
+        if not isinstance(item.get("product"), str):
+            raise ValueError("Product must be a product name")
+        quantity = item.get("quantity")
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError("Quantity must be an integer")
+        product = store.get_product(item["product"])
+        if product is None:
+            raise ValueError(f"Unknown product: {item['product']}")
+        shopping_list.append((product, quantity))
+    customer = order.get("customer")
+    if customer is not None and (not isinstance(customer, (str, int)) or isinstance(customer, bool)):
+        raise ValueError("Customer must be a string or an integer")
+    return shopping_list, order.get("id"), customer
+
+
+def execute_order(store: Store, order: dict) -> dict:
+    """
+    Executes an order request and returns its result
+    The result has the order id if one was given and either the total or the error. The error means nothing was
+    bought, lines Store.order could not buy (including unknown or inactive products) are returned as warnings
+    next to the total of the bought lines
+    :param store: Store: The store to order from
+    :param order: dict: The decoded order request
+    :return: dict: The result of the order
+    """
+    result = {}
+    try:
+        shopping_list, order_id, customer = parse_order(store, order)
+        if order_id is not None:
+            result["id"] = order_id
+        failures = []
+        result["total"] = store.order(shopping_list, customer, failures=failures)
+        if failures:
+            result["warnings"] = [f"Error buying {product}: {error}" for product, error in failures]
+    except ValueError as e:
+        result["error"] = str(e)
+    return result
+
+
+def quote_order(store: Store, order: dict) -> dict:
+    """ Quotes an order request without buying anything and returns the total or the error """
+    try:
+        shopping_list, order_id, _ = parse_order(store, order)
+        result = {"total": store.quote(shopping_list)}
+        if order_id is not None:
+            result["id"] = order_id
+        return result
+    except ValueError as e:
+        return {"error": str(e)}
@@ -1,6 +1,28 @@
+import gc
+import logging
 import sys
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterable
 
-from promotion import Promotion
+from change_feed import QUANTITY_CHANGED, PRICE_CHANGED, ACTIVATED, DEACTIVATED, PROMOTION_CHANGED, LIMIT_CHANGED
+from purchase_limiter import PurchaseLimiter
+
+if TYPE_CHECKING:
+    from promotion import Promotion # promotions are only imported by the code that creates them
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def paused_gc():
+    """ Pauses the cyclic garbage collector, which otherwise runs many times while lots of objects are created """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 
 class Product:
@@ -11,6 +33,12 @@ class Product:
         :param price: float: Price of the product
         :param quantity: int: Quantity of the product
         """
+        self._check(name, price, quantity)
+        Product._init_trusted(self, name, price, quantity)
+
+    @staticmethod
+    def _check(name: str, price: float, quantity: int) -> None:
+        """ Raises an error if name, price or quantity are not valid for a product """
         if not isinstance(name, str) or len(name) == 0:
             raise ValueError("Name must be a non empty string")
         if not isinstance(price, (int, float)):
@@ -22,11 +50,41 @@ class Product:
         if quantity < 0:
             raise ValueError("Quantity must be non-negative")
 
+    def _init_trusted(self, name: str, price: float, quantity: int) -> None:
+        """
+        Sets all attributes of the product from values known to be valid
+        This is the only place the attributes are set, the constructors check the values and call it.
+        Subclasses with more attributes extend it, its parameters are the fields of a bulk_from_trusted row
+        """
         self.name = name
         self.price = price
         self.quantity = quantity
-        self.active = False if quantity == 0 else True
+        self.active = quantity != 0
         self.promotion = None
+        self.observers = []
+
+    @classmethod
+    def from_trusted(cls, *fields) -> "Product":
+        """ Creates a product from data known to be valid, without the checks of the constructor """
+        return cls.bulk_from_trusted([fields])[0]
+
+    @classmethod
+    def bulk_from_trusted(cls, rows: Iterable[tuple]) -> list["Product"]:
+        """
+        Creates many products from data known to be valid, like our own snapshots, without the checks of the constructor
+        :param rows: Iterable[tuple]: The arguments of the constructor for every product, like name, price and
+        quantity for a Product
+        :return: list[Product]: The products
+        """
+        new = object.__new__
+        init = cls._init_trusted
+        products = []
+        with paused_gc():
+            for row in rows:
+                product = new(cls)
+                init(product, *row)
+                products.append(product)
+        return products
 
     def get_quantity(self) -> float: # Not sure why the documentation says it should return float. I think quantity should be an integer
         """ Returns the quantity of the product """
@@ -38,9 +96,27 @@ class Product:
             raise ValueError("New quantity must be an integer")
         if quantity < 0:
             raise ValueError("New quantity must be non-negative")
-        if quantity == 0:
-            self.active = False
+        old_quantity = self.quantity
         self.quantity = quantity
+        if quantity != old_quantity:
+            self._notify(QUANTITY_CHANGED, old_quantity, quantity)
+        if quantity == 0:
+            self.deactivate()
+
+    def get_price(self) -> float:
+        """ Returns the price of the product """
+        return self.price
+
+    def set_price(self, price: float) -> None:
+        """ Sets the price of the product """
+        if not isinstance(price, (int, float)):
+            raise ValueError("New price must be a number")
+        if price < 0:
+            raise ValueError("New price must be non-negative")
+        old_price = self.price
+        self.price = price
+        if price != old_price:
+            self._notify(PRICE_CHANGED, old_price, price)
 
     def is_active(self) -> bool:
         """ Returns whether the product is active or not """
@@ -48,11 +124,40 @@ class Product:
 
     def activate(self) -> None:
         """ Activates the product """
-        self.active = True
+        if not self.active:
+            self.active = True
+            self._notify(ACTIVATED, False, True)
 
     def deactivate(self) -> None:
         """ Deactivates the product """
-        self.active = False
+        if self.active:
+            self.active = False
+            self._notify(DEACTIVATED, True, False)
+
+    def add_observer(self, observer: Callable[[str, "Product", object, object], None]) -> None:
+        """
+        Registers an observer called as observer(kind, product, old_value, new_value) on every change
+        :param observer: Callable: The observer to call, kind is one of the change_feed event kinds
+        """
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[str, "Product", object, object], None]) -> None:
+        """ Removes an observer registered with add_observer """
+        if observer not in self.observers:
+            raise ValueError("Observer is not registered")
+        self.observers.remove(observer)
+
+    def _notify(self, kind: str, old_value, new_value) -> None:
+        """
+        Calls all observers with the change
+        The change is already made, so a failing observer is logged and does not stop the other observers
+        or the operation that made the change (like a buy that already took the stock)
+        """
+        for observer in tuple(self.observers): # observers may be removed while the change is delivered
+            try:
+                observer(kind, self, old_value, new_value)
+            except Exception:
+                logger.exception("Observer %r failed on %s of %s", observer, kind, self.name)
 
     def __str__(self) -> str:
         """ Returns the string representation of the product """
@@ -78,15 +183,38 @@ class Product:
         if quantity > self.quantity:
             raise ValueError("Not enough quantity in stock")
         self.set_quantity(self.quantity - quantity)
+        if self.promotion:
+            return self._buy_with_promotion(quantity)
+        return self.price * quantity
+
+    def _buy_with_promotion(self, quantity: int) -> float:
+        """ Applies the promotion to a bought quantity and adds it to the statistics of the promotion """
+        total_cost = self.promotion.apply_promotion(self, quantity)
+        self.promotion.record_application(quantity, self.price * quantity, total_cost)
+        return total_cost
+
+    def quote(self, quantity: int) -> float:
+        """
+        Returns the cost of buying the product without buying it
+        :param quantity: int: Quantity of the product to quote
+        :return: float: Total cost of the product
+        """
+        if not isinstance(quantity, int):
+            raise ValueError("Quantity must be an integer")
+        if quantity < 0:
+            raise ValueError("Quantity must be non-negative")
         if self.promotion:
             return self.promotion.apply_promotion(self, quantity)
         return self.price * quantity
 
-    def set_promotion(self, promotion: Promotion) -> None:
+    def set_promotion(self, promotion: "Promotion") -> None:
         """ Sets the promotion for the product """
+        old_promotion = self.promotion
         self.promotion = promotion
+        if promotion is not old_promotion:
+            self._notify(PROMOTION_CHANGED, old_promotion, promotion)
 
-    def get_promotion(self) -> Promotion or None:
+    def get_promotion(self) -> "Promotion" or None:
         """ Returns the promotion for the product """
         return self.promotion
 
@@ -116,8 +244,12 @@ class NonStockedProduct(Product):
         :param name:
         :param price:
         """
-        super().__init__(name, price, sys.maxsize) # not sure if sys.maxsize is the best way to represent infinity
-        self.active = True
+        self._check(name, price, sys.maxsize)
+        NonStockedProduct._init_trusted(self, name, price)
+
+    def _init_trusted(self, name: str, price: float) -> None:
+        """ Sets all attributes of the non stocked product from values known to be valid """
+        Product._init_trusted(self, name, price, sys.maxsize) # not sure if sys.maxsize is the best way to represent infinity
 
     def set_quantity(self, quantity: int) -> None:
         """ Raises an error as quantity cannot be set for non stocked product """
@@ -134,7 +266,7 @@ class NonStockedProduct(Product):
         if quantity < 0:
             raise ValueError("Quantity must be non-negative")
         if self.promotion:
-            return self.promotion.apply_promotion(self, quantity)
+            return self._buy_with_promotion(quantity)
         return self.price * quantity
 
     def __str__(self) -> str:
@@ -145,7 +277,8 @@ class NonStockedProduct(Product):
 
 
 class LimitedProduct(Product):
-    def __init__(self, name: str, price: float, quantity: int, limit: int) -> None:
+    def __init__(self, name: str, price: float, quantity: int, limit: int,
+                 limiter: PurchaseLimiter = None) -> None:
         """
         Constructor for the LimitedProduct class
 
@@ -153,23 +286,57 @@ class LimitedProduct(Product):
         :param price:
         :param quantity:
         :param limit:
+        :param limiter: PurchaseLimiter: Optional limiter enforcing the limit per customer over a time window
         """
         if not isinstance(limit, int):
             raise ValueError("Limit must be an integer")
         if limit < 0:
             raise ValueError("Limit must be non-negative")
-        super().__init__(name, price, quantity)
+        self._check(name, price, quantity)
+        LimitedProduct._init_trusted(self, name, price, quantity, limit, limiter)
+
+    def _init_trusted(self, name: str, price: float, quantity: int, limit: int,
+                      limiter: PurchaseLimiter = None) -> None:
+        """ Sets all attributes of the limited product from values known to be valid """
+        Product._init_trusted(self, name, price, quantity) # not super(), it is slower when creating many products
         self.limit = limit
+        self.limiter = limiter
 
-    def buy(self, quantity: int) -> float:
+    def buy(self, quantity: int, customer=None) -> float:
         """
         Buys the product and returns the total cost
         :param quantity: int: Quantity of the product to buy
+        :param customer: Hashable: Optional customer, the limit is then enforced over the limiter window
         :return: float: Total cost of the product
         """
-        if quantity > self.limit:
+        if isinstance(quantity, int) and quantity > self.limit:
+            raise ValueError(f"Quantity must be less than or equal to {self.limit}")
+        if customer is not None and self.limiter is not None:
+            self.limiter.check(customer, self.name, quantity, self.limit)
+        total_cost = super().buy(quantity)
+        if customer is not None and self.limiter is not None:
+            self.limiter.record(customer, self.name, quantity)
+        return total_cost
+
+    def check_order_limit(self, quantity: int, already_bought: int) -> None:
+        """
+        Raises an error if an order line would take the quantity of the product in one order over the limit,
+        shared by all stores so every store enforces the limit over all lines of an order the same way
+        :param quantity: int: Quantity of the order line
+        :param already_bought: int: Quantity of the product bought by the earlier lines of the same order
+        """
+        if isinstance(quantity, int) and already_bought + quantity > self.limit:
             raise ValueError(f"Quantity must be less than or equal to {self.limit}")
-        return super().buy(quantity)
+
+    def quote(self, quantity: int) -> float:
+        """
+        Returns the cost of buying the product without buying it
+        :param quantity: int: Quantity of the product to quote
+        :return: float: Total cost of the product
+        """
+        if isinstance(quantity, int) and quantity > self.limit:
+            raise ValueError(f"Quantity must be less than or equal to {self.limit}")
+        return super().quote(quantity)
 
     def __str__(self) -> str:
         """ Returns the string representation of the product """
@@ -181,12 +348,23 @@ class LimitedProduct(Product):
             raise ValueError("Limit must be an integer")
         if limit <= 0:
             raise ValueError("Limit must be non-negative")
+        old_limit = self.limit
         self.limit = limit
+        if limit != old_limit:
+            self._notify(LIMIT_CHANGED, old_limit, limit)
 
     def get_limit(self) -> int:
         """ Returns the limit of the product """
         return self.limit
 
+    def set_limiter(self, limiter: PurchaseLimiter or None) -> None:
+        """ Sets the limiter enforcing the limit per customer """
+        self.limiter = limiter
+
+    def get_limiter(self) -> PurchaseLimiter or None:
+        """ Returns the limiter enforcing the limit per customer """
+        return self.limiter
+
     def __eq__(self, other: "LimitedProduct") -> bool:
         """ Returns whether the two limited products are equal """
         return super().__eq__(other) and self.limit == other.limit
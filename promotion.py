@@ -11,11 +11,42 @@ class Promotion(ABC):
             raise ValueError("Name must not be empty")
 
         self.name = name
+        self.applications = 0
+        self.units = 0
+        self.gross = 0 # total at list price
+        self.net = 0 # total actually charged
 
     def __str__(self):
         """ Returns the name of the promotion """
         return self.name
 
+    def record_application(self, quantity: int, gross: float, net: float) -> None:
+        """
+        Adds one bought order line to the statistics of the promotion
+        :param quantity: int: Quantity bought
+        :param gross: float: Total of the line at list price
+        :param net: float: Total charged for the line
+        """
+        self.applications += 1
+        self.units += quantity
+        self.gross += gross
+        self.net += net
+
+    def get_discount(self) -> float:
+        """ Returns the total discount the promotion gave """
+        return self.gross - self.net
+
+    def get_stats(self) -> dict:
+        """ Returns the statistics of the promotion """
+        return {
+            "promotion": self.name,
+            "applications": self.applications,
+            "units": self.units,
+            "gross": self.gross,
+            "net": self.net,
+            "discount": self.get_discount()
+        }
+
     @abstractmethod
     def apply_promotion(self, product: "Product", quantity: int) -> float:
         """ Applies the promotion to the product and returns the total cost """
@@ -85,6 +116,48 @@ class PercentDiscountPromotion(Promotion):
         return product.price * quantity * (1 - self.percent / 100)
 
 
+def export_promotion_stats(promotions: list[Promotion]) -> list[dict]:
+    """ Returns the statistics of all promotions, every promotion object is exported once """
+    exported = {}
+    for promotion in promotions:
+        exported.setdefault(id(promotion), promotion.get_stats())
+    return list(exported.values())
+
+
+def promotion_to_spec(product_promotion: Promotion or None) -> str or None:
+    """ Returns the text stored for a promotion, like "PercentDiscountPromotion:30" """
+    if product_promotion is None:
+        return None
+    if isinstance(product_promotion, PercentDiscountPromotion):
+        return f"PercentDiscountPromotion:{product_promotion.percent}"
+    if isinstance(product_promotion, (SecondHalfPricePromotion, ThirdOneFreePromotion)):
+        return type(product_promotion).__name__
+    raise ValueError(f"Cannot store promotion {product_promotion}")
+
+
+def promotion_from_spec(spec: str or None, promotions: dict) -> Promotion or None:
+    """
+    Returns the promotion for a stored text, creating every promotion only once
+    :param spec: str or None: The stored text
+    :param promotions: dict: Already created promotions by their text, new ones are added
+    :return: Promotion or None: The promotion
+    """
+    if spec is None:
+        return None
+    if spec not in promotions:
+        kind, _, argument = spec.partition(":")
+        if kind == "PercentDiscountPromotion":
+            percent = float(argument)
+            promotions[spec] = PercentDiscountPromotion(int(percent) if percent.is_integer() else percent)
+        elif kind == "SecondHalfPricePromotion":
+            promotions[spec] = SecondHalfPricePromotion()
+        elif kind == "ThirdOneFreePromotion":
+            promotions[spec] = ThirdOneFreePromotion()
+        else:
+            raise ValueError(f"Unknown promotion {spec}")
+    return promotions[spec]
+
+
 def main():
     pass
 
@@ -0,0 +1,132 @@
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class PurchaseLimiter:
+    def __init__(self, window: float, buckets: int = 10, max_entries: int = 1_000_000,
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        Constructor for the PurchaseLimiter class
+        Counts how many units every customer bought of every product inside a sliding time window.
+        The window is split into a fixed number of buckets, so every (customer, product) entry is a
+        small ring of counters. Entries whose whole window has expired are evicted when space is needed. An entry
+        with purchases inside its window is never evicted, since that would reset the usage of its customer:
+        while max_entries live entries exist, check fails for customers without an entry (it fails closed), so
+        max_entries should be sized for the number of customers buying inside one window
+        :param window: float: Length of the time window in seconds
+        :param buckets: int: Number of buckets the window is split into (the resolution of the sliding window)
+        :param max_entries: int: Maximum number of (customer, product) entries kept in memory. An entry takes
+        about 230 bytes for its key and dict slot plus 8 + 4 bytes per bucket, not counting the customer object, so
+        1_000_000 entries of int customers with 10 buckets take about 270MB when the limiter is full
+        :param clock: Callable[[], float]: Function returning the current time in seconds
+        """
+        if not isinstance(window, (int, float)) or window <= 0:
+            raise ValueError("Window must be a positive number")
+        if not isinstance(buckets, int) or buckets <= 0:
+            raise ValueError("Buckets must be a positive integer")
+        if not isinstance(max_entries, int) or max_entries <= 0:
+            raise ValueError("Max entries must be a positive integer")
+
+        self.window = window
+        self.buckets = buckets
+        self.max_entries = max_entries
+        self.clock = clock
+        self.bucket_width = window / buckets
+        # every entry uses a slot of the typed arrays instead of a list of int objects
+        self.entries = OrderedDict() # (customer, product name) -> slot number
+        self.last_buckets = array("q") # last bucket number by slot
+        self.counts = array("I") # counts of slot s are counts[s * buckets:(s + 1) * buckets]
+        self.free_slots = [] # slots of evicted entries, reused before the arrays grow
+        self.empty_slot = array("I", [0]) * buckets
+
+    def _current_bucket(self) -> int:
+        """ Returns the number of the bucket the current time falls into """
+        return int(self.clock() // self.bucket_width)
+
+    def _new_slot(self, bucket: int) -> int:
+        """ Returns an empty slot for a new entry, the arrays only grow while there are no free slots """
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.counts[slot * self.buckets:(slot + 1) * self.buckets] = self.empty_slot
+            self.last_buckets[slot] = bucket
+            return slot
+        self.counts.extend(self.empty_slot)
+        self.last_buckets.append(bucket)
+        return len(self.last_buckets) - 1
+
+    def _advance(self, slot: int, bucket: int) -> None:
+        """ Clears all buckets of the entry that fell out of the window since it was last touched """
+        last_bucket = self.last_buckets[slot]
+        if bucket <= last_bucket:
+            return
+        start = slot * self.buckets
+        if bucket - last_bucket >= self.buckets:
+            self.counts[start:start + self.buckets] = self.empty_slot
+        else:
+            for number in range(last_bucket + 1, bucket + 1):
+                self.counts[start + number % self.buckets] = 0
+        self.last_buckets[slot] = bucket
+
+    def _usage(self, slot: int) -> int:
+        """ Returns the sum of the buckets of the entry """
+        start = slot * self.buckets
+        return sum(self.counts[start:start + self.buckets])
+
+    def _evict_expired(self, bucket: int) -> None:
+        """
+        Evicts the least recently recorded entries that have no purchases inside the window any more.
+        Entries are ordered by their last purchase, so the first one that still has purchases ends the search
+        """
+        while self.entries:
+            key, slot = next(iter(self.entries.items()))
+            self._advance(slot, bucket)
+            if self._usage(slot) > 0:
+                return
+            del self.entries[key]
+            self.free_slots.append(slot)
+
+    def _has_room(self, key: tuple) -> bool:
+        """ Returns whether the entry exists or a new one fits, evicting expired entries if needed """
+        if key in self.entries or len(self.entries) < self.max_entries:
+            return True
+        self._evict_expired(self._current_bucket())
+        return len(self.entries) < self.max_entries
+
+    def get_usage(self, customer: Hashable, product_name: str) -> int:
+        """ Returns how many units the customer bought of the product inside the current window """
+        slot = self.entries.get((customer, product_name))
+        if slot is None:
+            return 0
+        self._advance(slot, self._current_bucket())
+        return self._usage(slot)
+
+    def check(self, customer: Hashable, product_name: str, quantity: int, limit: int) -> None:
+        """
+        Raises an error if buying quantity more units would exceed the limit for the customer, or if the customer
+        has no entry and the limiter is full of entries with purchases inside their window
+        """
+        if not self._has_room((customer, product_name)):
+            raise ValueError("Too many customers are buying, try again later")
+        if self.get_usage(customer, product_name) + quantity > limit:
+            raise ValueError(f"Customer {customer} can buy at most {limit} per {self.window} seconds")
+
+    def record(self, customer: Hashable, product_name: str, quantity: int) -> None:
+        """ Records that the customer bought quantity units of the product, check must have passed before """
+        bucket = self._current_bucket()
+        key = (customer, product_name)
+        slot = self.entries.get(key)
+        if slot is None:
+            if not self._has_room(key):
+                raise ValueError("Too many customers are buying, try again later")
+            slot = self._new_slot(bucket)
+            self.entries[key] = slot
+        else:
+            self._advance(slot, bucket)
+            self.entries.move_to_end(key)
+        self.counts[slot * self.buckets + bucket % self.buckets] += quantity
+
+    def __len__(self) -> int:
+        """ Returns the number of (customer, product) entries kept in memory """
+        return len(self.entries)
@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, List
+
+from store import Store
+
+logger = logging.getLogger(__name__)
+
+
+class RepricingScheduler:
+    def __init__(self, store: Store, clock: Callable[[], float] = time.time) -> None:
+        """
+        Constructor for the RepricingScheduler class
+        Keeps scheduled price changes in a priority queue ordered by effective time
+        :param store: Store: The store to reprice
+        :param clock: Callable[[], float]: Function returning the current time in seconds
+        """
+        self.store = store
+        self.clock = clock
+        self.queue = [] # (effective time, ticket, names, price, percent)
+        self.cancelled = set()
+        self.tickets = itertools.count(1)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def schedule(self, effective_time: float, names: List[str], price: float = None, percent: float = None) -> int:
+        """
+        Schedules a price change, see Store.reprice
+        The price or percent and the names are validated now, products removed before the change is due are
+        reported when it is applied
+        :param effective_time: float: Time in seconds (as returned by the clock) the change takes effect
+        :param names: List[str]: Names of the products to reprice
+        :param price: float: New price for all products
+        :param percent: float: Price change in percent, negative for a discount
+        :return: int: Ticket to cancel the change with
+        """
+        Store.check_reprice(price, percent)
+        names = list(names)
+        self.store.find_by_names(names)
+        with self.condition:
+            ticket = next(self.tickets)
+            heapq.heappush(self.queue, (effective_time, ticket, names, price, percent))
+            self.condition.notify()
+        return ticket
+
+    def cancel(self, ticket: int) -> None:
+        """ Cancels a scheduled price change """
+        with self.condition:
+            if not any(entry[1] == ticket for entry in self.queue) or ticket in self.cancelled:
+                raise ValueError("Ticket is not scheduled")
+            self.cancelled.add(ticket)
+
+    def next_effective_time(self) -> float or None:
+        """ Returns the time of the next scheduled price change, or None if nothing is scheduled """
+        with self.condition:
+            self._drop_cancelled()
+            return self.queue[0][0] if self.queue else None
+
+    def _drop_cancelled(self) -> None:
+        """ Removes cancelled changes from the top of the queue """
+        while self.queue and self.queue[0][1] in self.cancelled:
+            self.cancelled.discard(heapq.heappop(self.queue)[1])
+
+    def run_pending(self) -> int:
+        """
+        Applies all changes that are due, in order of their effective time
+        All of them are applied under one store lock, so readers see them in one new snapshot
+        :return: int: Number of applied changes
+        """
+        with self.condition:
+            now = self.clock()
+            due = []
+            self._drop_cancelled()
+            while self.queue and self.queue[0][0] <= now:
+                entry = heapq.heappop(self.queue)
+                if entry[1] in self.cancelled:
+                    self.cancelled.discard(entry[1])
+                    continue
+                due.append(entry)
+                self._drop_cancelled()
+        if not due:
+            return 0
+
+        with self.store.lock, self.store.change_feed.batch():
+            for _, _, names, price, percent in due:
+                try:
+                    self.store.reprice(self.store.find_by_names(names), price, percent)
+                except ValueError:
+                    logger.exception("Error repricing %s", ", ".join(names))
+        return len(due)
+
+    def start(self) -> None:
+        """ Starts a thread applying the changes when they are due """
+        if self.thread is not None:
+            raise ValueError("Scheduler is already running")
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="repricing-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """ Stops the scheduler thread """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self) -> None:
+        """ Sleeps until the next change is due and applies it """
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                next_time = self.next_effective_time()
+                timeout = None if next_time is None else max(0.0, next_time - self.clock())
+                if timeout is None or timeout > 0:
+                    self.condition.wait(timeout)
+                    continue
+            self.run_pending()
@@ -0,0 +1,246 @@
+import time
+
+STARTED = time.perf_counter() # the startup report measures the imports below from here
+
+import argparse
+import json
+import queue
+import signal
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from order_requests import execute_order, quote_order
+from store import Store
+
+IMPORTED = time.perf_counter()
+
+
+class OrderBatcher:
+    def __init__(self, store: Store, max_batch: int = 64) -> None:
+        """
+        Constructor for the OrderBatcher class
+        Runs the orders of all request threads on one thread, taking the store lock once per batch of waiting orders
+        :param store: Store: The store to order from
+        :param max_batch: int: Maximum number of orders executed per lock acquisition
+        """
+        if not isinstance(max_batch, int) or max_batch <= 0:
+            raise ValueError("Max batch must be a positive integer")
+
+        self.store = store
+        self.max_batch = max_batch
+        self.orders = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="order-batcher", daemon=True)
+        self.stopped = False
+
+    def start(self) -> None:
+        """ Starts the batching thread """
+        self.thread.start()
+
+    def submit(self, order: dict) -> Future:
+        """ Queues an order and returns a future for its result """
+        if self.stopped:
+            raise ValueError("Order batcher is stopped")
+        future = Future()
+        self.orders.put((order, future))
+        return future
+
+    def stop(self) -> None:
+        """ Executes all queued orders and stops the batching thread """
+        self.stopped = True
+        self.orders.put(None)
+        self.thread.join()
+
+    def _run(self) -> None:
+        """ Takes the waiting orders off the queue and executes them in batches """
+        while True:
+            batch = [self.orders.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.orders.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            with self.store.lock:
+                for item in batch:
+                    if item is None:
+                        continue
+                    order, future = item
+                    try:
+                        future.set_result(execute_order(self.store, order))
+                    except Exception as e:
+                        future.set_exception(e)
+            if stop:
+                return
+
+
+class StoreRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep connections alive between requests
+
+    def do_GET(self) -> None:
+        """ GET /products lists the active products from the latest catalog snapshot """
+        if self.path != "/products":
+            self.send_json(404, {"error": "Not found"})
+            return
+        snapshot = self.server.store.get_snapshot()
+        self.send_json(200, {
+            "version": snapshot.version,
+            "products": [{"name": product.name, "price": product.price, "quantity": product.quantity,
+                          "promotion": str(product.promotion) if product.promotion else None}
+                         for product in snapshot.get_all_products()]
+        })
+
+    def do_POST(self) -> None:
+        """
+        POST /quote quotes one order, POST /order places one order and POST /orders places a list of orders.
+        Orders are placed through the order batcher. Unexpected errors are answered with status 500
+        """
+        try:
+            body = self.read_json()
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        try:
+            self.handle_post(body)
+        except Exception as e:
+            self.log_error("Error handling %s: %r", self.path, e)
+            self.send_json(500, {"error": "Internal server error"})
+
+    def handle_post(self, body) -> None:
+        """ Answers a POST request with a decoded body """
+        if self.path == "/quote":
+            self.send_json(200, quote_order(self.server.store, body))
+        elif self.path == "/order":
+            self.send_json(200, self.server.batcher.submit(body).result())
+        elif self.path == "/orders":
+            if not isinstance(body, list):
+                self.send_json(400, {"error": "Body must be a list of orders"})
+                return
+            futures = [self.server.batcher.submit(order) for order in body]
+            self.send_json(200, [future.result() for future in futures])
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def read_json(self):
+        """ Reads and decodes the JSON body of the request """
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise ValueError("Content-Length is required")
+        try:
+            return json.loads(self.rfile.read(int(length)))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def send_json(self, status: int, data) -> None:
+        """ Sends data as a JSON response with a Content-Length, so the connection can be reused """
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.saturated:
+            # connections are waiting for a worker, do not keep this one waiting for another request
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """ Only logs when the server is verbose """
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StoreServer(HTTPServer):
+    def __init__(self, store: Store, host: str = "127.0.0.1", port: int = 8000, workers: int = 16,
+                 max_batch: int = 64, verbose: bool = False, idle_timeout: float = 5) -> None:
+        """
+        Constructor for the StoreServer class
+        HTTP/JSON server for a store. Every connection is handled by a worker of a bounded pool. While all
+        workers are busy no further connections are accepted, they wait in the listen backlog of the socket,
+        and the busy workers close their connections after the current response instead of keeping them alive.
+        An idle keep-alive connection holds its worker for up to idle_timeout seconds
+        :param store: Store: The store to serve
+        :param host: str: Host to listen on
+        :param port: int: Port to listen on, 0 for any free port
+        :param workers: int: Number of worker threads, which is also the number of connections served at once
+        :param max_batch: int: Maximum number of orders executed per store lock acquisition
+        :param verbose: bool: Whether to log every request
+        :param idle_timeout: float: Seconds an idle keep-alive connection is kept open
+        """
+        if not isinstance(workers, int) or workers <= 0:
+            raise ValueError("Workers must be a positive integer")
+
+        super().__init__((host, port), StoreRequestHandler)
+        self.store = store
+        self.verbose = verbose
+        self.idle_timeout = idle_timeout
+        self.free_workers = threading.BoundedSemaphore(workers)
+        self.saturated = False
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="store-worker")
+        self.batcher = OrderBatcher(store, max_batch)
+        self.batcher.start()
+
+    def process_request(self, request, client_address) -> None:
+        """ Hands the connection to the worker pool, waiting until a worker is free """
+        if not self.free_workers.acquire(blocking=False):
+            self.saturated = True
+            self.free_workers.acquire()
+            self.saturated = False
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        """ Serves one connection on a worker """
+        try:
+            request.settimeout(self.idle_timeout)
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.free_workers.release()
+
+    def graceful_shutdown(self) -> None:
+        """ Stops accepting connections, waits for the running requests and executes the queued orders """
+        self.shutdown()
+        self.server_close()
+        self.executor.shutdown(wait=True)
+        self.batcher.stop()
+
+
+def main():
+    from main import startup, startup_report
+
+    parser = argparse.ArgumentParser(description="HTTP/JSON order API for the Best Buy store")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--catalog", metavar="FILE", help="load the store from a compiled catalog artifact")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time spent in every startup phase to stderr")
+    args = parser.parse_args()
+
+    phases = [("imports", IMPORTED - STARTED)]
+    store = startup(args.catalog, phases)
+    if args.startup_report:
+        print(startup_report(phases), file=sys.stderr, flush=True)
+    server = StoreServer(store, args.host, args.port, args.workers, args.max_batch, args.verbose)
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() waits for serve_forever, so it must not run on the serving thread
+            threading.Thread(target=server.graceful_shutdown).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
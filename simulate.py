@@ -0,0 +1,160 @@
+import argparse
+import itertools
+import random
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from load_generator import percentile
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import SecondHalfPricePromotion, ThirdOneFreePromotion, PercentDiscountPromotion
+from store import Store
+
+
+def build_catalog(size: int, stock: int, seed: int = 0) -> list[Product]:
+    """
+    Builds a synthetic catalog with all product types and promotions
+    :param size: int: Number of products
+    :param stock: int: Quantity of every stocked product
+    :param seed: int: Seed of the random prices and promotions
+    :return: list[Product]: The products, named "SKU <index>"
+    """
+    rng = random.Random(seed)
+    promotions = [SecondHalfPricePromotion(), ThirdOneFreePromotion(), PercentDiscountPromotion(20)]
+    products = []
+    for index in range(size):
+        name = f"SKU {index}"
+        price = rng.randint(1, 2000)
+        kind = rng.random()
+        if kind < 0.05:
+            product = NonStockedProduct(name, price)
+        elif kind < 0.15:
+            product = LimitedProduct(name, price, stock, 2)
+        else:
+            product = Product(name, price, stock)
+        if rng.random() < 0.2:
+            product.set_promotion(rng.choice(promotions))
+        products.append(product)
+    return products
+
+
+def generate_orders(catalog_size: int, orders: int, lines: int, skew: float, seed: int = 0) -> list[list[tuple[int, int]]]:
+    """
+    Generates orders whose products follow a Zipf-like distribution, so a few hot SKUs get most of the lines
+    :param catalog_size: int: Number of products in the catalog
+    :param orders: int: Number of orders
+    :param lines: int: Maximum number of lines per order
+    :param skew: float: Zipf exponent, 0 for uniform demand, higher for hotter hot SKUs
+    :param seed: int: Seed of the random orders
+    :return: list[list[tuple[int, int]]]: Orders as lists of (product index, quantity)
+    """
+    rng = random.Random(seed)
+    cumulative_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(catalog_size)))
+    indexes = list(range(catalog_size))
+    return [[(index, rng.randint(1, 3))
+             for index in rng.choices(indexes, cum_weights=cumulative_weights, k=rng.randint(1, lines))]
+            for _ in range(orders)]
+
+
+def replay_shard(arguments: tuple) -> dict:
+    """
+    Replays orders against a fresh copy of the catalog, runs in a worker process
+    :param arguments: tuple: Catalog size, stock per product, catalog seed and the orders of the shard
+    :return: dict: Seconds spent replaying (without building the catalog), order latencies in seconds,
+    requested and failed lines per product index
+    """
+    catalog_size, stock, seed, orders = arguments
+    products = build_catalog(catalog_size, stock, seed)
+    store = Store(products)
+    indexes = {product.name: index for index, product in enumerate(products)}
+    latencies = []
+    requested = Counter()
+    failed = Counter()
+    replay_start = time.perf_counter()
+    for order in orders:
+        shopping_list = [(products[index], quantity) for index, quantity in order]
+        bought = len(store.order_history)
+        start = time.perf_counter()
+        try:
+            store.order(shopping_list, failures=[]) # failed lines are counted below instead of printed
+        except ValueError:
+            pass # a sold out product ends the order, its lines are counted as failed below
+        latencies.append(time.perf_counter() - start)
+        bought_indexes = Counter(indexes[line[1]] for line in store.order_history.lines(bought))
+        for index, _ in order:
+            requested[index] += 1
+            if bought_indexes[index]:
+                bought_indexes[index] -= 1
+            else:
+                failed[index] += 1
+    return {"seconds": time.perf_counter() - replay_start, "latencies": latencies, "requested": requested,
+            "failed": failed}
+
+
+def simulate(catalog_size: int, orders: int, lines: int, skew: float, workers: int, stock: int,
+             seed: int = 0) -> dict:
+    """
+    Replays a synthetic order stream on sharded copies of a synthetic store
+    Every worker process gets its own copy of the catalog with stock divided by the number of workers
+    and a share of the orders. Throughput is measured over the replay of the slowest shard, without starting
+    the workers and building their catalogs, which is reported separately as setup seconds.
+    The shards share nothing, so there is no lock contention between them: the hot SKUs are the most
+    requested products with their failed (sold out) lines, not measured contention
+    :return: dict: Orders, seconds, setup seconds, orders per second, latency percentiles in milliseconds and
+    hot SKUs
+    """
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValueError("Workers must be a positive integer")
+
+    stream = generate_orders(catalog_size, orders, lines, skew, seed)
+    shards = [(catalog_size, max(1, stock // workers), seed, stream[shard::workers]) for shard in range(workers)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [replay_shard(shards[0])]
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(replay_shard, shards)
+    total_seconds = time.perf_counter() - start
+    elapsed = max(result["seconds"] for result in results)
+
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    requested = sum((result["requested"] for result in results), Counter())
+    failed = sum((result["failed"] for result in results), Counter())
+    return {
+        "orders": len(latencies),
+        "seconds": elapsed,
+        "setup_seconds": max(0.0, total_seconds - elapsed),
+        "orders_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "hot_skus": [(f"SKU {index}", count, failed[index]) for index, count in requested.most_common(10)],
+        "failed_lines": sum(failed.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays synthetic order load against sharded stores")
+    parser.add_argument("--catalog-size", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--lines", type=int, default=5, help="maximum lines per order")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the demand")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--stock", type=int, default=10_000, help="stock per product over all shards")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = simulate(args.catalog_size, args.orders, args.lines, args.skew, args.workers, args.stock, args.seed)
+    print(f"{report['orders']} orders in {report['seconds']:.2f}s, {report['orders_per_second']:.0f} orders/s "
+          f"(plus {report['setup_seconds']:.2f}s starting workers and building catalogs)")
+    print(f"latency p50 {report['p50_ms']:.3f}ms, p95 {report['p95_ms']:.3f}ms, "
+          f"p99 {report['p99_ms']:.3f}ms, max {report['max_ms']:.3f}ms")
+    print(f"{report['failed_lines']} order lines failed")
+    print("Hot SKUs (lines, failed lines), demand and stock-outs since the shards share no lock:")
+    for name, count, failed in report["hot_skus"]:
+        print(f"  {name}: {count}, {failed}")
+
+
+if __name__ == "__main__":
+    main()
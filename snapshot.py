@@ -0,0 +1,163 @@
+from itertools import chain
+from typing import Iterator, Tuple
+
+CHUNK_SIZE = 512 # products per chunk, a publish copies the changed chunks and the tuple of chunks
+
+
+class ProductSnapshot:
+    __slots__ = ("name", "price", "quantity", "active", "promotion", "limit", "product_type")
+
+    def __init__(self, product: "Product") -> None:
+        """
+        Constructor for the ProductSnapshot class
+        Immutable copy of the state of a product at the time the snapshot was taken
+        :param product: Product: The product to copy
+        """
+        object.__setattr__(self, "name", product.name)
+        object.__setattr__(self, "price", product.price)
+        object.__setattr__(self, "quantity", product.quantity)
+        object.__setattr__(self, "active", product.active)
+        object.__setattr__(self, "promotion", product.promotion)
+        object.__setattr__(self, "limit", getattr(product, "limit", None))
+        object.__setattr__(self, "product_type", type(product).__name__)
+
+    def __setattr__(self, name, value):
+        """ Snapshots are immutable """
+        raise AttributeError("ProductSnapshot is immutable")
+
+    def is_active(self) -> bool:
+        """ Returns whether the product was active """
+        return self.active
+
+    def __str__(self) -> str:
+        """ Returns the string representation of the product, in the same format as Product """
+        quantity = "∞" if self.product_type == "NonStockedProduct" else self.quantity
+        text = f"{self.name}, Price: {self.price}, Quantity: {quantity}, Promotion: {self.promotion}"
+        if self.limit is not None:
+            text += f", Limit: {self.limit}"
+        return text
+
+
+class SnapshotProducts:
+    __slots__ = ("chunks", "length")
+
+    def __init__(self, chunks: Tuple[Tuple[ProductSnapshot, ...], ...], length: int) -> None:
+        """
+        Constructor for the SnapshotProducts class
+        Immutable sequence of the product snapshots of a catalog, stored in chunks of CHUNK_SIZE products so
+        the next version can share every chunk without changes
+        :param chunks: Tuple[Tuple[ProductSnapshot, ...], ...]: The chunks, all but the last one are full
+        :param length: int: Number of products
+        """
+        object.__setattr__(self, "chunks", chunks)
+        object.__setattr__(self, "length", length)
+
+    def __setattr__(self, name, value):
+        """ Snapshots are immutable """
+        raise AttributeError("SnapshotProducts is immutable")
+
+    def __getitem__(self, index: int) -> ProductSnapshot:
+        """ Returns the product snapshot at a position, negative positions count from the end """
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Snapshot index out of range")
+        return self.chunks[index // CHUNK_SIZE][index % CHUNK_SIZE]
+
+    def __len__(self) -> int:
+        """ Returns the number of products """
+        return self.length
+
+    def __iter__(self) -> Iterator[ProductSnapshot]:
+        """ Iterates over the products in store order """
+        return chain.from_iterable(self.chunks)
+
+
+def chunked(views: list[ProductSnapshot]) -> SnapshotProducts:
+    """ Returns the product snapshots split into chunks """
+    return SnapshotProducts(tuple(tuple(views[start:start + CHUNK_SIZE])
+                                  for start in range(0, len(views), CHUNK_SIZE)), len(views))
+
+
+class CatalogSnapshot:
+    __slots__ = ("version", "products", "total_quantity")
+
+    def __init__(self, version: int, products: SnapshotProducts, total_quantity: int) -> None:
+        """
+        Constructor for the CatalogSnapshot class
+        Immutable, versioned view of all products of a store. Readers can hold it as long as they want
+        without locking, the store publishes a new snapshot instead of changing this one
+        :param version: int: Version of the catalog, increases with every published snapshot
+        :param products: SnapshotProducts: Snapshots of all products, in store order
+        :param total_quantity: int: Sum of the quantities of all products
+        """
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "products", products)
+        object.__setattr__(self, "total_quantity", total_quantity)
+
+    def __setattr__(self, name, value):
+        """ Snapshots are immutable """
+        raise AttributeError("CatalogSnapshot is immutable")
+
+    def get_all_products(self) -> list[ProductSnapshot]:
+        """ Returns all active products of the snapshot """
+        return [product for product in self.products if product.active]
+
+    def get_total_quantity(self) -> int:
+        """ Returns the total quantity of all products of the snapshot """
+        return self.total_quantity
+
+    def __len__(self) -> int:
+        """ Returns the number of products in the snapshot """
+        return len(self.products)
+
+    def __iter__(self) -> Iterator[ProductSnapshot]:
+        """ Iterates over all products in the snapshot """
+        return iter(self.products)
+
+
+def build_snapshot(previous: CatalogSnapshot or None, products: list["Product"], positions: dict,
+                   changed: dict, structure_changed: bool) -> CatalogSnapshot:
+    """
+    Builds the next snapshot of a catalog, copying only the products that changed
+    Without added or removed products only the chunks holding changed products are copied, so the cost
+    depends on the number of changed products and not on the size of the catalog
+    :param previous: CatalogSnapshot or None: The last published snapshot, None to copy every product
+    :param products: list[Product]: The current products of the store
+    :param positions: dict: Position of every product in the previous snapshot, by product id
+    :param changed: dict: The products changed since the previous snapshot, by product id
+    :param structure_changed: bool: Whether products were added or removed since the previous snapshot
+    :return: CatalogSnapshot: The new snapshot, sharing every unchanged ProductSnapshot with the previous one
+    """
+    if previous is None:
+        views = [ProductSnapshot(product) for product in products]
+        return CatalogSnapshot(1, chunked(views), sum(view.quantity for view in views))
+
+    if not structure_changed:
+        # same products as before, only replace the chunks of the changed ones
+        chunks = list(previous.products.chunks)
+        copied = {} # chunk number -> list copy of the chunk
+        total_quantity = previous.total_quantity
+        for product in changed.values():
+            position = positions.get(id(product))
+            if position is None:
+                # changed after it was removed from the store
+                continue
+            number, offset = divmod(position, CHUNK_SIZE)
+            chunk = copied.get(number)
+            if chunk is None:
+                chunk = copied[number] = list(chunks[number])
+            view = ProductSnapshot(product)
+            total_quantity += view.quantity - chunk[offset].quantity
+            chunk[offset] = view
+        for number, chunk in copied.items():
+            chunks[number] = tuple(chunk)
+        return CatalogSnapshot(previous.version + 1, SnapshotProducts(tuple(chunks), previous.products.length),
+                               total_quantity)
+
+    # products were added or removed, reuse the snapshots of all unchanged products
+    views = [previous.products[positions[id(product)]]
+             if id(product) in positions and id(product) not in changed
+             else ProductSnapshot(product)
+             for product in products]
+    return CatalogSnapshot(previous.version + 1, chunked(views), sum(view.quantity for view in views))
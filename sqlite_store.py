@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+from typing import List
+
+import catalog_db
+from order_history import OrderHistory
+from products import Product, LimitedProduct, NonStockedProduct
+
+# statements are constant so sqlite3 can reuse the prepared statement from its cache
+INSERT_PRODUCT = f"INSERT INTO products ({catalog_db.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+DELETE_PRODUCT = "DELETE FROM products WHERE name = ?"
+SELECT_PRODUCT = f"SELECT {catalog_db.COLUMNS} FROM products WHERE name = ?"
+SELECT_ACTIVE = f"SELECT {catalog_db.COLUMNS} FROM products WHERE active = 1 ORDER BY rowid"
+SELECT_TOTAL_QUANTITY = "SELECT COALESCE(SUM(quantity), 0) FROM products WHERE kind != 'NonStockedProduct'"
+# only takes the stock if there is enough of it, and deactivates the product when it sells out
+BUY_STOCK = """
+UPDATE products
+SET quantity = quantity - ?1, active = CASE WHEN quantity = ?1 THEN 0 ELSE active END
+WHERE name = ?2 AND quantity >= ?1
+"""
+
+
+class SQLiteStore:
+    def __init__(self, path: str) -> None:
+        """
+        Constructor for the SQLiteStore class
+        Store with the same API as Store that keeps its inventory in SQLite instead of in memory.
+        Every order runs as one transaction and takes stock with a conditional UPDATE, so several processes
+        can order from the same database file. Order history and promotion statistics are kept in memory for the
+        orders of this store object only, other processes ordering from the same file are not included
+        :param path: str: Path of the database file, ":memory:" for a database that is not stored
+        """
+        self.connection = catalog_db.connect(path)
+        self.connection.isolation_level = None # transactions are started explicitly
+        self.promotions = {} # promotion text -> promotion, shared by all products
+        self.order_history = OrderHistory()
+        self.lock = threading.RLock()
+
+    def add_product(self, product: Product) -> None:
+        """ Adds a product to the store """
+        if not isinstance(product, Product):
+            raise ValueError("Product must be of type Product")
+        with self.lock:
+            if product in self:
+                raise ValueError("Product already exists in the store")
+            self.connection.execute(INSERT_PRODUCT, catalog_db.product_to_row(product))
+
+    def add_products(self, products: List[Product]) -> None:
+        """ Adds many products to the store in one transaction """
+        if not all(isinstance(product, Product) for product in products):
+            raise ValueError("All elements of products must be of type Product")
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(INSERT_PRODUCT, [catalog_db.product_to_row(product)
+                                                             for product in products])
+            except sqlite3.IntegrityError:
+                self.connection.execute("ROLLBACK")
+                raise ValueError("Product already exists in the store")
+            self.connection.execute("COMMIT")
+
+    def remove_product(self, product: Product) -> None:
+        """ Removes a product from the store """
+        if not isinstance(product, Product):
+            raise ValueError("Product must be of type Product")
+        with self.lock:
+            if self.connection.execute(DELETE_PRODUCT, (product.name,)).rowcount == 0:
+                raise ValueError("Product does not exist in the store")
+
+    def get_product(self, name: str) -> Product or None:
+        """ Returns a copy of the product with the given name, or None if the store has no such product """
+        with self.lock:
+            row = self.connection.execute(SELECT_PRODUCT, (name,)).fetchone()
+        return None if row is None else catalog_db.product_from_row(row, self.promotions)
+
+    def get_total_quantity(self) -> int:
+        """ Returns the total quantity of all stocked products in the store """
+        with self.lock:
+            return self.connection.execute(SELECT_TOTAL_QUANTITY).fetchone()[0]
+
+    def get_all_products(self) -> List[Product]:
+        """ Returns copies of all active products in the store, changing them does not change the store """
+        with self.lock:
+            rows = self.connection.execute(SELECT_ACTIVE).fetchall()
+        return [catalog_db.product_from_row(row, self.promotions) for row in rows]
+
+    def _load(self, product: Product) -> Product:
+        """ Returns a copy of the stored product for an order line """
+        row = self.connection.execute(SELECT_PRODUCT, (product.name,)).fetchone() \
+            if isinstance(product, Product) else None
+        if row is None:
+            raise ValueError("Product does not exist in the store")
+        shop_product = catalog_db.product_from_row(row, self.promotions)
+        if not shop_product.is_active():
+            raise ValueError("Product is not active")
+        return shop_product
+
+    def quote(self, shopping_list: list[tuple[Product, int]]) -> float:
+        """
+        Returns the cost of an order without buying anything
+        :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :return: float: Total cost of the order
+        """
+        with self.lock:
+            return sum(self._load(product).quote(quantity) for product, quantity in shopping_list)
+
+    def order(self, shopping_list: list[tuple[Product, int]], customer=None, failures: list = None) -> float:
+        """
+        Orders products from the store in one transaction, the products are looked up by name
+        :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :param customer: Hashable: Accepted for compatibility with Store.order, purchase limiters are not stored
+        in the database so there are no per customer limits
+        :param failures: list: Optional list, (product, error message) is appended to it for every line that could
+        not be bought, including lines with unknown or inactive products. Without it these lines are printed and
+        an unknown or inactive product raises an error. Any error rolls back the whole order
+        :return: float: Total cost of the order
+        """
+        total_cost = 0
+        limited_quantities = {} # quantities of limited products already bought in this order, by name
+        bought = [] # (product, quantity, cost) of the bought lines, recorded once the order is committed
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for product, quantity in shopping_list:
+                    try:
+                        shop_product = self._load(product)
+                    except ValueError as e:
+                        if failures is None:
+                            raise
+                        failures.append((product, str(e)))
+                        continue
+                    try:
+                        cost = shop_product.quote(quantity)
+                        already_bought = limited_quantities.get(shop_product.name, 0)
+                        if isinstance(shop_product, LimitedProduct):
+                            shop_product.check_order_limit(quantity, already_bought)
+                        if not isinstance(shop_product, NonStockedProduct):
+                            if self.connection.execute(BUY_STOCK, (quantity, shop_product.name)).rowcount == 0:
+                                raise ValueError("Not enough quantity in stock")
+                        limited_quantities[shop_product.name] = already_bought + quantity
+                        bought.append((shop_product, quantity, cost))
+                        total_cost += cost
+                    except ValueError as e:
+                        if failures is None:
+                            print(f"Error buying {shop_product}: {e}")
+                        else:
+                            failures.append((shop_product, str(e)))
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+            for shop_product, quantity, cost in bought:
+                if shop_product.promotion is not None:
+                    shop_product.promotion.record_application(quantity, shop_product.price * quantity, cost)
+                self.order_history.record(shop_product, quantity, cost)
+
+        return total_cost
+
+    def get_promotion_stats(self) -> list[dict]:
+        """ Returns the statistics of the promotions of the products ordered from this store object """
+        from promotion import export_promotion_stats
+
+        return export_promotion_stats(list(self.promotions.values()))
+
+    def close(self) -> None:
+        """ Closes the database """
+        with self.lock:
+            self.connection.close()
+
+    def __contains__(self, item) -> bool:
+        """ Checks if a product (or a product name) is in the store """
+        name = item.name if isinstance(item, Product) else item
+        with self.lock:
+            return self.connection.execute(SELECT_PRODUCT, (name,)).fetchone() is not None
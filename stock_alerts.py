@@ -0,0 +1,103 @@
+import heapq
+import itertools
+import logging
+from typing import Callable
+
+from change_feed import QUANTITY_CHANGED
+from products import Product, NonStockedProduct
+
+logger = logging.getLogger(__name__)
+
+
+class LowStockMonitor:
+    def __init__(self, callback: Callable[[Product, int, int], None]) -> None:
+        """
+        Constructor for the LowStockMonitor class
+        Calls callback(product, threshold, quantity) at the moment the quantity of a watched product drops
+        from above its threshold to or below it. Only watched products are observed, so the cost depends on
+        the number of changes of watched products, not on the size of the catalog.
+        The callback runs inside buy or set_quantity (during Store.order that is while the store lock is held),
+        so it should only hand the alert on. Exceptions of the callback are logged, the change that crossed the
+        threshold is already made and stays
+        :param callback: Callable[[Product, int, int], None]: Called with the product, its threshold and its new quantity
+        """
+        self.callback = callback
+        self.thresholds = {} # product id -> (product, threshold)
+        self.versions = {} # product id -> version of its newest heap entry
+        self.heap = [] # (headroom, version, product id), older versions of a product are stale
+        self.version_counter = itertools.count(1)
+
+    def watch(self, product: Product, threshold: int) -> None:
+        """ Sets the low stock threshold of a product """
+        if not isinstance(product, Product) or isinstance(product, NonStockedProduct):
+            raise ValueError("Product must be a stocked product")
+        if not isinstance(threshold, int):
+            raise ValueError("Threshold must be an integer")
+        if threshold < 0:
+            raise ValueError("Threshold must be non-negative")
+
+        if id(product) not in self.thresholds:
+            product.add_observer(self._on_product_change)
+        self.thresholds[id(product)] = (product, threshold)
+        self._index(product)
+
+    def unwatch(self, product: Product) -> None:
+        """ Removes the low stock threshold of a product """
+        if id(product) not in self.thresholds:
+            raise ValueError("Product is not watched")
+        del self.thresholds[id(product)]
+        del self.versions[id(product)]
+        product.remove_observer(self._on_product_change)
+
+    def _index(self, product: Product) -> None:
+        """ Puts the current headroom of the product into the heap """
+        _, threshold = self.thresholds[id(product)]
+        version = next(self.version_counter)
+        self.versions[id(product)] = version
+        heapq.heappush(self.heap, (product.quantity - threshold, version, id(product)))
+        if len(self.heap) > 2 * len(self.thresholds) + 64:
+            # drop the stale entries
+            self.heap = [entry for entry in self.heap if self.versions.get(entry[2]) == entry[1]]
+            heapq.heapify(self.heap)
+
+    def _on_product_change(self, kind: str, product: Product, old_value, new_value) -> None:
+        """ Updates the index and fires the callback when the quantity crosses the threshold """
+        if kind != QUANTITY_CHANGED or id(product) not in self.thresholds:
+            return
+        _, threshold = self.thresholds[id(product)]
+        self._index(product)
+        if old_value > threshold >= new_value:
+            try:
+                self.callback(product, threshold, new_value)
+            except Exception:
+                logger.exception("Low stock callback failed for %s", product.name)
+
+    def lowest_headroom(self, count: int, max_headroom: int = None) -> list[tuple[int, Product]]:
+        """
+        Returns the watched products closest to (or furthest below) their threshold
+        :param count: int: Maximum number of products to return
+        :param max_headroom: int: Only return products with at most this headroom
+        :return: list[tuple[int, Product]]: Headroom (quantity minus threshold) and product, smallest headroom first
+        """
+        result = []
+        taken = []
+        while self.heap and len(result) < count:
+            if max_headroom is not None and self.heap[0][0] > max_headroom:
+                break
+            entry = heapq.heappop(self.heap)
+            if self.versions.get(entry[2]) != entry[1]:
+                continue
+            taken.append(entry)
+            result.append((entry[0], self.thresholds[entry[2]][0]))
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return result
+
+    def below_threshold(self) -> list[Product]:
+        """ Returns all watched products at or below their threshold """
+        return [product for _, product in self.lowest_headroom(len(self.thresholds), max_headroom=0)]
+
+    def close(self) -> None:
+        """ Stops watching all products """
+        for product, _ in list(self.thresholds.values()):
+            self.unwatch(product)
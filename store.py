@@ -1,19 +1,123 @@
-from typing import List
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, List
 
-from products import Product
+from change_feed import ChangeFeed, PRICE_CHANGED, PRODUCT_ADDED, PRODUCT_REMOVED
+from products import Product, LimitedProduct, NonStockedProduct, paused_gc
+from profiler import NO_OPERATION, SamplingProfiler
+from order_history import OrderHistory
+from snapshot import CatalogSnapshot, build_snapshot
+from warehouse import Warehouse, WarehouseStock
+
+if TYPE_CHECKING:
+    from promotion import Promotion
+
+
+def _product_observer(store_reference: weakref.ref):
+    """ Returns the observer a store registers on its products, it does not keep the store alive """
+    def observer(kind: str, product: Product, old_value, new_value) -> None:
+        store = store_reference()
+        if store is not None:
+            store._on_product_change(kind, product, old_value, new_value)
+    return observer
+
+
+def _detach(products: List[Product], observer) -> None:
+    """ Removes the observer of a closed or garbage collected store from its products """
+    for product in products:
+        if observer in product.observers:
+            product.remove_observer(observer)
 
 
 class Store:
 
-    def __init__(self, products: List[Product]) -> None:
+    def __init__(self, products: List[Product], validate: bool = True) -> None:
         """
         Constructor for the Store class
+        The store observes its products until it is closed or garbage collected, a product can be in several
+        stores at once (like the stores combined with +) and every change is sent to all of them
         :param products: List[Product]: List of products in the store
+        :param validate: bool: Whether to check the type of every product, pass False for trusted data
         """
-        if not all(isinstance(product, Product) for product in products):
+        if validate and not all(isinstance(product, Product) for product in products):
             raise ValueError("All elements of products must be of type Product")
 
-        self.products = products
+        with paused_gc():
+            self.products = products
+            self.change_feed = ChangeFeed()
+            self.lock = threading.RLock() # held by writers while they change the catalog, never by readers
+            self._changed_products = {}
+            self._structure_changed = False
+            self._positions = {id(product): index for index, product in enumerate(products)}
+            self._snapshot = build_snapshot(None, products, self._positions, {}, True)
+            self._products_by_name = {}
+            self._price_index = None # (sorted prices, products in the same order), built on demand
+            self.warehouse_stock = {} # product id -> WarehouseStock
+            self.order_history = OrderHistory()
+            self.profiler = None
+            self._observer = _product_observer(weakref.ref(self))
+            self._detach = weakref.finalize(self, _detach, products, self._observer)
+            for product in products:
+                self._products_by_name.setdefault(product.name, product)
+                product.add_observer(self._observer)
+
+    def _on_product_change(self, kind: str, product: Product, old_value, new_value) -> None:
+        """ Forwards a change of one of the products to the change feed and marks it for the next snapshot """
+        self._changed_products[id(product)] = product
+        if kind == PRICE_CHANGED:
+            self._price_index = None
+        self.change_feed.publish(kind, product, old_value, new_value)
+
+    def _publish_snapshot(self) -> None:
+        """ Publishes a new snapshot with all changes since the last one, the caller must hold the lock """
+        changed, self._changed_products = self._changed_products, {}
+        if not changed and not self._structure_changed:
+            return
+        self._snapshot = build_snapshot(self._snapshot, self.products, self._positions, changed,
+                                        self._structure_changed)
+        if self._structure_changed:
+            self._positions = {id(product): index for index, product in enumerate(self.products)}
+            self._structure_changed = False
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """
+        Returns an immutable snapshot of the catalog
+        Never waits for a running order: while a writer holds the lock the last published snapshot is returned
+        """
+        if (self._changed_products or self._structure_changed) and self.lock.acquire(blocking=False):
+            try:
+                self._publish_snapshot()
+            finally:
+                self.lock.release()
+        return self._snapshot
+
+    def _operation(self, name: str):
+        """ Returns the context tagging profiler samples with the operation name, a no-op while profiling is off """
+        profiler = self.profiler
+        return NO_OPERATION if profiler is None else profiler.operation(name)
+
+    def enable_profiling(self, interval: float = 0.005) -> SamplingProfiler:
+        """
+        Starts sampling the store operations, can be called while the store is in use
+        :param interval: float: Seconds between two samples, see SamplingProfiler for the overhead
+        :return: SamplingProfiler: The running profiler, write_collapsed writes its flame graph input
+        """
+        if self.profiler is not None:
+            raise ValueError("Profiling is already enabled")
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        self.profiler = profiler
+        return profiler
+
+    def disable_profiling(self) -> SamplingProfiler:
+        """ Stops sampling and returns the profiler with its samples """
+        profiler = self.profiler
+        if profiler is None:
+            raise ValueError("Profiling is not enabled")
+        self.profiler = None
+        profiler.stop()
+        return profiler
 
     def add_product(self, product: Product) -> None:
         """ Adds a product to the store """
@@ -22,7 +126,14 @@ class Store:
         if product in self.products:
             raise ValueError("Product already exists in the store")
 
-        self.products.append(product)
+        with self.lock:
+            self.products.append(product)
+            self._products_by_name.setdefault(product.name, product)
+            product.add_observer(self._observer)
+            self._structure_changed = True
+            self._price_index = None
+            self._publish_snapshot()
+        self.change_feed.publish(PRODUCT_ADDED, product)
 
     def remove_product(self, product: Product) -> None:
         """ Removes a product from the store """
@@ -31,7 +142,57 @@ class Store:
         if product not in self.products:
             raise ValueError("Product does not exist in the store")
 
-        self.products.remove(product)
+        with self.lock:
+            shop_product = self.products.pop(self.products.index(product))
+            if self._products_by_name.get(shop_product.name) is shop_product:
+                del self._products_by_name[shop_product.name]
+                for other in self.products:
+                    if other.name == shop_product.name:
+                        self._products_by_name[other.name] = other
+                        break
+            shop_product.remove_observer(self._observer)
+            self.warehouse_stock.pop(id(shop_product), None)
+            self._structure_changed = True
+            self._price_index = None
+            self._publish_snapshot()
+        self.change_feed.publish(PRODUCT_REMOVED, shop_product)
+
+    def close(self) -> None:
+        """ Stops observing the products, changes of the products are no longer seen by this store """
+        with self.lock:
+            self._detach()
+
+    def get_product(self, name: str) -> Product or None:
+        """ Returns the product with the given name, or None if the store has no such product """
+        return self._products_by_name.get(name)
+
+    def set_warehouse_stock(self, stock: WarehouseStock) -> None:
+        """ Makes orders of the product take their units from the warehouses of the stock """
+        if not isinstance(stock, WarehouseStock):
+            raise ValueError("Stock must be of type WarehouseStock")
+        with self.lock:
+            if id(stock.product) not in self._positions:
+                raise ValueError("Product does not exist in the store")
+            self.warehouse_stock[id(stock.product)] = stock
+
+    def get_warehouse_stock(self, product: Product) -> WarehouseStock or None:
+        """ Returns the warehouse stock of the product, or None if the product is not stocked per warehouse """
+        return self.warehouse_stock.get(id(product))
+
+    def set_stock(self, product: Product, warehouse: Warehouse, quantity: int) -> None:
+        """
+        Sets the stock of a product in one of its warehouses while holding the lock, so orders never see the
+        stock half updated. Use this instead of WarehouseStock.set_stock once the stock belongs to the store
+        :param product: Product: The product, stocked per warehouse with set_warehouse_stock
+        :param warehouse: Warehouse: The warehouse
+        :param quantity: int: The new stock of the product in the warehouse
+        """
+        with self._operation("set_stock"), self.lock, self.change_feed.batch():
+            stock = self.warehouse_stock.get(id(product))
+            if stock is None:
+                raise ValueError("Product is not stocked per warehouse in this store")
+            stock.set_stock(warehouse, quantity)
+            self._publish_snapshot()
 
     def get_total_quantity(self) -> int:
         """ Returns the total quantity of all products in the store """
@@ -41,30 +202,209 @@ class Store:
         """ Returns all active products in the store """
         return [product for product in self.products if product.is_active()]
 
-    def order(self, shopping_list: list[tuple[Product, int]]) -> float:
+    def quote(self, shopping_list: list[tuple[Product, int]]) -> float:
+        """
+        Returns the cost of an order without buying anything
+        :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :return: float: Total cost of the order
+        """
+        total_cost = 0
+        with self._operation("quote"):
+            for product, quantity in shopping_list:
+                if product not in self.products:
+                    raise ValueError("Product does not exist in the store")
+                shop_product = self.products[self.products.index(product)]
+                if not shop_product.is_active():
+                    raise ValueError("Product is not active")
+                total_cost += shop_product.quote(quantity)
+        return total_cost
+
+    def order(self, shopping_list: list[tuple[Product, int]], customer=None, allocations: list = None,
+              failures: list = None) -> float:
         """
         Orders products from the store
         :param shopping_list: list[tuple[Product, int]]: List of tuples where the first element is the product and the second element is the quantity
+        :param customer: Hashable: Optional customer placing the order, used for per customer purchase limits
+        :param allocations: list: Optional list, (product, [(warehouse, quantity), ...]) is appended to it for
+        every line taken from warehouse stock
+        :param failures: list: Optional list, (product, error message) is appended to it for every line that could
+        not be bought, including lines with unknown or inactive products, so every line fails on its own.
+        Without it these lines are printed, and an unknown or inactive product raises an error that ends the
+        order (the lines before it stay bought)
         :return: float: Total cost of the order
         """
+        with self._operation("order"), self.lock, self.change_feed.batch():
+            try:
+                return self._order(shopping_list, customer, allocations, failures)
+            finally:
+                self._publish_snapshot()
+
+    def _order(self, shopping_list: list[tuple[Product, int]], customer, allocations: list or None,
+               failures: list or None) -> float:
+        """ Orders products from the store, see order """
         total_cost = 0
+        limited_quantities = {} # quantities of limited products already bought in this order, by product id
         for product, quantity in shopping_list:
             if product not in self.products:
-                raise ValueError("Product does not exist in the store")
+                if failures is None:
+                    raise ValueError("Product does not exist in the store")
+                failures.append((product, "Product does not exist in the store"))
+                continue
             shop_product = self.products[self.products.index(product)] # just to ensure that the product is the same object in the store
             if not shop_product.is_active():
-                raise ValueError("Product is not active")
+                if failures is None:
+                    raise ValueError("Product is not active")
+                failures.append((shop_product, "Product is not active"))
+                continue
 
             try:
-                total_cost += shop_product.buy(quantity)
+                total_cost += self._buy(shop_product, quantity, customer, limited_quantities, allocations)
             except ValueError as e:
-                print(f"Error buying {shop_product}: {e}")
+                if failures is None:
+                    print(f"Error buying {shop_product}: {e}")
+                else:
+                    failures.append((shop_product, str(e)))
 
         return total_cost
 
+    def _buy(self, product: Product, quantity: int, customer, limited_quantities: dict,
+             allocations: list or None) -> float:
+        """ Buys one line of an order, taking the units from the cheapest warehouses if the product has warehouse stock """
+        stock = self.warehouse_stock.get(id(product))
+        allocation = None if stock is None else stock.allocate(quantity)
+        try:
+            if isinstance(product, LimitedProduct):
+                cost = self._buy_limited(product, quantity, customer, limited_quantities)
+            else:
+                cost = product.buy(quantity)
+        except ValueError:
+            if allocation is not None:
+                stock.release(allocation)
+            raise
+        if allocation is not None and allocations is not None:
+            allocations.append((product, allocation))
+        self.order_history.record(product, quantity, cost)
+        return cost
+
+    @staticmethod
+    def _buy_limited(product: LimitedProduct, quantity: int, customer, limited_quantities: dict) -> float:
+        """ Buys a limited product, enforcing the limit over all lines of the same order """
+        already_bought = limited_quantities.get(id(product), 0)
+        product.check_order_limit(quantity, already_bought)
+        cost = product.buy(quantity, customer)
+        limited_quantities[id(product)] = already_bought + quantity
+        return cost
+
+    def restock(self, deltas: dict[str, int], reactivate: bool = True) -> dict[str, int]:
+        """
+        Changes the quantities of many products at once
+        The whole feed is validated before anything changes, so either every change is applied or none.
+        Subscribers of the change feed get all changes in one batch and one new snapshot is published
+        :param deltas: dict[str, int]: Quantity change by product name, negative to remove stock
+        :param reactivate: bool: Whether to activate products that were sold out and have stock again.
+        Products deactivated while they still had stock stay inactive
+        :return: dict[str, int]: New quantity by product name
+        """
+        with self._operation("restock"), self.lock:
+            changes = []
+            errors = []
+            for name, delta in deltas.items():
+                product = self._products_by_name.get(name)
+                if product is None:
+                    errors.append(f"{name}: product does not exist in the store")
+                elif isinstance(product, NonStockedProduct):
+                    errors.append(f"{name}: cannot restock non stocked product")
+                elif id(product) in self.warehouse_stock:
+                    errors.append(f"{name}: restock warehouse stock per warehouse")
+                elif not isinstance(delta, int) or isinstance(delta, bool):
+                    errors.append(f"{name}: quantity change must be an integer")
+                elif product.quantity + delta < 0:
+                    errors.append(f"{name}: not enough quantity in stock")
+                else:
+                    changes.append((product, delta))
+            if errors:
+                raise ValueError("Invalid restock: " + "; ".join(errors))
+
+            with self.change_feed.batch():
+                for product, delta in changes:
+                    sold_out = product.quantity == 0
+                    product.set_quantity(product.quantity + delta)
+                    if reactivate and sold_out and product.quantity > 0:
+                        product.activate()
+                self._publish_snapshot()
+            return {product.name: product.quantity for product, _ in changes}
+
+    def get_promotion_stats(self) -> list[dict]:
+        """ Returns the statistics of all promotions of the products in the store """
+        from promotion import export_promotion_stats
+
+        return export_promotion_stats([product.promotion for product in self.products if product.promotion])
+
+    def find_by_names(self, names: List[str]) -> List[Product]:
+        """ Returns the products with the given names, raises an error if one does not exist """
+        products = []
+        for name in names:
+            product = self._products_by_name.get(name)
+            if product is None:
+                raise ValueError(f"Product {name} does not exist in the store")
+            products.append(product)
+        return products
+
+    def find_by_price_band(self, lowest_price: float, highest_price: float) -> List[Product]:
+        """ Returns all products with lowest_price <= price <= highest_price, ordered by price """
+        price_index = self._price_index
+        if price_index is None:
+            ordered = sorted(self.products, key=lambda product: product.price)
+            price_index = ([product.price for product in ordered], ordered)
+            self._price_index = price_index
+        prices, ordered = price_index
+        return ordered[bisect_left(prices, lowest_price):bisect_right(prices, highest_price)]
+
+    def find_by_promotion(self, promotion: "Promotion") -> List[Product]:
+        """ Returns all products with the given promotion """
+        return [product for product in self.products if product.promotion is promotion]
+
+    @staticmethod
+    def check_reprice(price: float or None, percent: float or None) -> None:
+        """ Raises an error if the arguments of reprice are not valid, without changing anything """
+        if (price is None) == (percent is None):
+            raise ValueError("Either price or percent must be given")
+        if percent is not None:
+            if not isinstance(percent, (int, float)):
+                raise ValueError("Percent must be a number")
+            if percent < -100:
+                raise ValueError("Percent must be at least -100")
+        elif not isinstance(price, (int, float)) or price < 0:
+            raise ValueError("Price must be a non-negative number")
+
+    def reprice(self, products: List[Product], price: float = None, percent: float = None) -> None:
+        """
+        Changes the price of many products at once
+        Either price or percent must be given. All new prices are validated before anything changes,
+        subscribers of the change feed get all changes in one batch and one new snapshot is published
+        :param products: List[Product]: The products to reprice, for example from find_by_price_band
+        :param price: float: New price for all products
+        :param percent: float: Price change in percent, negative for a discount. Prices are rounded to cents
+        """
+        self.check_reprice(price, percent)
+        with self._operation("reprice"), self.lock:
+            for product in products:
+                if id(product) not in self._positions:
+                    raise ValueError("Product does not exist in the store")
+            with self.change_feed.batch():
+                for product in products:
+                    if percent is not None:
+                        product.set_price(round(product.price * (1 + percent / 100), 2))
+                    else:
+                        product.set_price(price)
+                self._publish_snapshot()
+
     def __add__(self, other: "Store") -> "Store":
-        """ Adds two stores together """
-        return Store(self.products + other.products)
+        """ Adds two stores together, the warehouse stock of both stores is kept """
+        store = Store(self.products + other.products)
+        for stock in list(self.warehouse_stock.values()) + list(other.warehouse_stock.values()):
+            store.set_warehouse_stock(stock)
+        return store
 
     def __contains__(self, item):
         """ Checks if a product is in the store """
@@ -0,0 +1,61 @@
+import marshal
+import os
+import subprocess
+import sys
+
+import pytest
+
+from catalog_artifact import compile_catalog, read_catalog, read_catalog_version
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import SecondHalfPricePromotion, PercentDiscountPromotion
+from store import Store
+
+
+def test_round_trip(tmp_path):
+    half_price = SecondHalfPricePromotion()
+    inactive = Product("Test Product 2", 20, 5)
+    inactive.deactivate()
+    products = [Product("Test Product 1", 10, 5), inactive, NonStockedProduct("Test Product 3", 30),
+                LimitedProduct("Test Product 4", 40, 5, 1), Product("Test Product 5", 2.5, 0)]
+    products[0].set_promotion(half_price)
+    products[2].set_promotion(PercentDiscountPromotion(30))
+    products[3].set_promotion(half_price)
+    path = str(tmp_path / "catalog.bin")
+    compile_catalog(products, path, catalog_version=7)
+
+    loaded = read_catalog(path)
+    assert [type(product) for product in loaded] == [type(product) for product in products]
+    assert [str(product) for product in loaded] == [str(product) for product in products]
+    assert [product.is_active() for product in loaded] == [True, False, True, True, False]
+    assert loaded[3].limit == 1
+    assert loaded[0].promotion is loaded[3].promotion
+    assert loaded[2].promotion.percent == 30
+    assert read_catalog_version(path) == 7
+
+    store = Store(loaded, validate=False)
+    assert store.order([(loaded[0], 2), (loaded[2], 1)]) == 15 + 21
+    assert store.get_product("Test Product 1").quantity == 3
+
+
+def test_rejects_other_versions(tmp_path):
+    path = tmp_path / "catalog.bin"
+    compile_catalog([Product("Test Product 1", 10, 5)], str(path))
+    artifact = marshal.loads(path.read_bytes())
+    artifact["version"] += 1
+    path.write_bytes(marshal.dumps(artifact))
+    with pytest.raises(ValueError, match="version"):
+        read_catalog(str(path))
+
+    path.write_bytes(b"not an artifact")
+    with pytest.raises(ValueError, match="not a catalog artifact"):
+        read_catalog(str(path))
+
+
+def test_read_without_promotions_does_not_import_promotion(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    compile_catalog([Product("Test Product 1", 10, 5)], path)
+    code = ("import sys; from catalog_artifact import read_catalog; from store import Store; "
+            f"Store(read_catalog({path!r})); print('promotion' in sys.modules, 'asyncio' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.split() == ["False", "False"]
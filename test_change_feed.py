@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from change_feed import (ChangeFeed, QUANTITY_CHANGED, ACTIVATED, DEACTIVATED, PRODUCT_ADDED,
+                         PRODUCT_REMOVED)
+from products import Product
+from store import Store
+
+
+def test_publish_delivers_immediately():
+    feed = ChangeFeed()
+    batches = []
+    feed.subscribe(batches.append)
+    product = Product("Test Product", 10, 5)
+    feed.publish(QUANTITY_CHANGED, product, 5, 4)
+    assert len(batches) == 1
+    assert batches[0][0].kind == QUANTITY_CHANGED
+    assert batches[0][0].new_value == 4
+
+
+def test_batch_holds_back_delivery():
+    feed = ChangeFeed(batch_size=2)
+    batches = []
+    feed.subscribe(batches.append)
+    product = Product("Test Product", 10, 5)
+    with feed.batch():
+        feed.publish(ACTIVATED, product)
+        assert batches == []
+        feed.publish(DEACTIVATED, product)
+        assert len(batches) == 1
+        feed.publish(ACTIVATED, product)
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def test_ring_buffer_and_events_since():
+    feed = ChangeFeed(capacity=3)
+    product = Product("Test Product", 10, 5)
+    for i in range(5):
+        feed.publish(QUANTITY_CHANGED, product, i, i + 1)
+    assert len(feed) == 3
+    assert [event.sequence for event in feed.events_since(3)] == [4, 5]
+    assert feed.events_since(5) == []
+    with pytest.raises(ValueError, match="already evicted"):
+        feed.events_since(1)
+
+
+def test_unsubscribe():
+    feed = ChangeFeed()
+    batches = []
+    feed.subscribe(batches.append)
+    feed.unsubscribe(batches.append)
+    feed.publish(ACTIVATED, Product("Test Product", 10, 5))
+    assert batches == []
+    with pytest.raises(ValueError, match="Callback is not subscribed"):
+        feed.unsubscribe(batches.append)
+
+
+def test_async_subscription():
+    async def consume():
+        feed = ChangeFeed()
+        subscription = feed.subscribe_async()
+        product = Product("Test Product", 10, 5)
+        feed.publish(QUANTITY_CHANGED, product, 5, 3)
+        feed.publish(QUANTITY_CHANGED, product, 3, 1)
+        subscription.close()
+        return [event.new_value async for batch in subscription for event in batch]
+
+    assert asyncio.run(consume()) == [3, 1]
+
+
+def test_store_mutations_emit_events():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 5)
+    store = Store([product1])
+    batches = []
+    store.change_feed.subscribe(batches.append)
+
+    store.add_product(product2)
+    store.order([(product1, 5), (product2, 1)])
+    product2.deactivate()
+    store.remove_product(product2)
+
+    kinds = [[event.kind for event in batch] for batch in batches]
+    assert kinds == [[PRODUCT_ADDED],
+                     [QUANTITY_CHANGED, DEACTIVATED, QUANTITY_CHANGED],
+                     [DEACTIVATED],
+                     [PRODUCT_REMOVED]]
+    product2.activate()
+    assert len(batches) == 4
+
+
+def test_failing_observers_do_not_break_orders(caplog):
+    product = Product("Test Product 1", 10, 5)
+    store = Store([product])
+
+    def failing(*args):
+        raise ValueError("observer failed")
+
+    product.add_observer(failing)
+    store.change_feed.subscribe(failing)
+    batches = []
+    store.change_feed.subscribe(batches.append)
+    assert store.order([(product, 4)]) == 40
+    assert product.quantity == 1
+    assert len(store.order_history) == 1
+    assert len(batches) == 1
+    assert "Observer" in caplog.text and "subscriber" in caplog.text
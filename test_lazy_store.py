@@ -0,0 +1,104 @@
+import pytest
+
+from lazy_store import LazyStore
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import PercentDiscountPromotion
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LazyStore(str(tmp_path / "catalog.db"), cache_size=2)
+    discount = PercentDiscountPromotion(30)
+    product = Product("Test Product 1", 10, 5)
+    product.set_promotion(discount)
+    store.add_product(product)
+    store.add_product(Product("Test Product 2", 20, 5))
+    store.add_product(NonStockedProduct("Test Product 3", 30))
+    store.add_product(LimitedProduct("Test Product 4", 40, 5, 1))
+    yield store
+    store.close()
+
+
+def test_products_are_loaded_on_demand(store):
+    assert len(store) == 4
+    assert len(store.cache) == 0
+    product = store.get_product("Test Product 1")
+    assert str(product) == "Test Product 1, Price: 10, Quantity: 5, Promotion: 30% Discount!"
+    assert store.get_product("Test Product 1") is product
+    assert store.get_product("Test Product 5") is None
+
+
+def test_order_writes_back_on_eviction(store):
+    assert store.order([(Product("Test Product 1", 10, 5), 2), (store.get_product("Test Product 2"), 5)]) == 114
+    assert set(store.dirty) == {"Test Product 1", "Test Product 2"}
+    store.get_product("Test Product 3")
+    store.get_product("Test Product 4")
+    assert len(store.cache) == 2
+    assert store.dirty == {}
+    assert store.get_product("Test Product 1").quantity == 3
+    assert not store.get_product("Test Product 2").is_active()
+
+
+def test_get_all_products_and_total_quantity(store):
+    store.order([(store.get_product("Test Product 2"), 5)])
+    assert [product.name for product in store.get_all_products()] == [
+        "Test Product 1", "Test Product 3", "Test Product 4"]
+    assert store.get_total_quantity() == 10
+
+
+def test_order_errors(store, capsys):
+    with pytest.raises(ValueError, match="Product does not exist in the store"):
+        store.order([(Product("Test Product 5", 10, 5), 1)])
+    limited = store.get_product("Test Product 4")
+    assert store.order([(limited, 1), (limited, 1)]) == 40
+    assert "Quantity must be less than or equal to 1" in capsys.readouterr().out
+
+
+def test_add_and_remove_product(store):
+    with pytest.raises(ValueError, match="Product already exists in the store"):
+        store.add_product(Product("Test Product 1", 10, 5))
+    store.remove_product(store.get_product("Test Product 1"))
+    assert "Test Product 1" not in store
+    with pytest.raises(ValueError, match="Product does not exist in the store"):
+        store.remove_product(Product("Test Product 1", 10, 5))
+
+
+def test_promotions_are_shared(tmp_path):
+    store = LazyStore(str(tmp_path / "catalog.db"))
+    for index in range(2):
+        product = Product(f"Test Product {index}", 10, 5)
+        product.set_promotion(PercentDiscountPromotion(30))
+        store.add_product(product)
+    assert store.get_product("Test Product 0").promotion is store.get_product("Test Product 1").promotion
+    store.close()
+
+
+def test_evicted_products_still_held_keep_their_changes(store):
+    product = store.get_product("Test Product 1")
+    store.get_product("Test Product 2")
+    store.get_product("Test Product 3")
+    assert "Test Product 1" not in store.cache
+    product.set_quantity(1)
+    store.flush()
+    assert store.connection.execute("SELECT quantity FROM products WHERE name = 'Test Product 1'").fetchone()[0] == 1
+    assert store.get_product("Test Product 1") is product
+
+
+def test_iter_products_reads_in_chunks(store):
+    held = store.get_product("Test Product 4")
+    products = store.iter_products(chunk_size=1)
+    assert next(products).name == "Test Product 1"
+    store.add_product(Product("Test Product 5", 50, 5))
+    assert [product.name for product in products] == ["Test Product 2", "Test Product 3", "Test Product 4",
+                                                      "Test Product 5"]
+    assert held in list(store.iter_products(chunk_size=2))
+
+
+def test_write_back_during_iteration_keeps_the_order(store):
+    products = store.iter_products(chunk_size=2)
+    assert [next(products).name, next(products).name] == ["Test Product 1", "Test Product 2"]
+    store.order([(store.get_product("Test Product 1"), 1), (store.get_product("Test Product 2"), 1)])
+    store.flush()
+    assert [product.name for product in products] == ["Test Product 3", "Test Product 4"]
+    assert [product.name for product in store.get_all_products()] == [
+        "Test Product 1", "Test Product 2", "Test Product 3", "Test Product 4"]
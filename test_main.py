@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from catalog_artifact import compile_catalog
+from main import (initialize_best_buy, best_buy_products, execute_order_line, batch_command, run_batch, startup,
+                  startup_report)
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def test_execute_order_line():
+    store = initialize_best_buy()
+    result = execute_order_line(store, 1, '{"id": 7, "items": [{"product": "Google Pixel 7", "quantity": 2}]}')
+    assert result == {"line": 1, "id": 7, "total": 1000}
+    assert store.get_product("Google Pixel 7").quantity == 248
+
+
+@pytest.mark.parametrize("line, error", [
+    ('{"items": [{"product": "Shipping", "quantity": "1"}]}', "Quantity must be an integer"),
+    ('{"items": [{"product": "Google Pixel 7", "quantity": true}]}', "Quantity must be an integer"),
+    ('{"items": [{"product": ["x"], "quantity": 1}]}', "Product must be a product name"),
+    ('{"items": [{"product": "Unknown", "quantity": 1}]}', "Unknown product: Unknown"),
+    ('{"items": 3}', "Order must be an object with a list of items"),
+    ('{"items": [', "Invalid JSON"),
+])
+def test_execute_order_line_rejects_bad_lines(line, error):
+    store = initialize_best_buy()
+    total_quantity = store.get_total_quantity()
+    result = execute_order_line(store, 3, line)
+    assert result["line"] == 3
+    assert result["error"].startswith(error)
+    assert store.get_total_quantity() == total_quantity
+
+
+def test_execute_order_line_warnings():
+    store = initialize_best_buy()
+    result = execute_order_line(store, 1, '{"items": [{"product": "Shipping", "quantity": 2}]}')
+    assert result["total"] == 0
+    assert result["warnings"] == ["Error buying Shipping, Price: 10, Quantity: 250, Promotion: None, Limit: 1: "
+                                  "Quantity must be less than or equal to 1"]
+
+
+def test_execute_order_line_inactive_line_fails_on_its_own():
+    store = initialize_best_buy()
+    result = execute_order_line(store, 1, '{"id": 1, "items": [{"product": "Google Pixel 7", "quantity": 250}, '
+                                          '{"product": "MacBook Air M2", "quantity": 1}, '
+                                          '{"product": "Google Pixel 7", "quantity": 1}]}')
+    assert result["total"] == 250 * 500 + 1450
+    assert result["warnings"] == ["Error buying Google Pixel 7, Price: 500, Quantity: 0, Promotion: None: "
+                                  "Product is not active"]
+    assert store.get_product("MacBook Air M2").quantity == 99
+
+
+@pytest.mark.parametrize("customer", ['["alice"]', '{"name": "alice"}', 'true', '1.5'])
+def test_execute_order_line_rejects_bad_customers(customer):
+    store = initialize_best_buy()
+    result = execute_order_line(store, 1, '{"customer": %s, "items": [{"product": "Shipping", "quantity": 1}]}'
+                                % customer)
+    assert result["error"] == "Customer must be a string or an integer"
+    assert store.get_product("Shipping").quantity == 250
+
+
+def test_run_batch():
+    store = initialize_best_buy()
+    output = io.StringIO()
+    failed = run_batch(store, [(1, '{"items": [{"product": "Google Pixel 7", "quantity": 1}]}'), (2, "not json")],
+                       output)
+    assert failed == 1
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert results[0] == {"line": 1, "total": 500}
+    assert results[1]["line"] == 2 and "error" in results[1]
+
+
+def test_batch_command():
+    store = initialize_best_buy()
+    lines = ['{"items": [{"product": "Google Pixel 7", "quantity": 1}]}'] * 5 + ["", '{"items": [{"product": 1}]}']
+    output = io.StringIO()
+    report = batch_command(store, io.StringIO("\n".join(lines) + "\n"), output, batch_size=2, report_stream=None)
+    assert report["orders"] == 6
+    assert report["failed"] == 1
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 7]
+    assert store.get_product("Google Pixel 7").quantity == 245
+    with pytest.raises(ValueError):
+        batch_command(store, io.StringIO(), output, batch_size=0)
+
+
+def test_batch_flags(tmp_path):
+    orders = tmp_path / "orders.jsonl"
+    orders.write_text('{"id": 1, "items": [{"product": "MacBook Air M2", "quantity": 2}]}\n'
+                      '{"items": [{"product": "Shipping", "quantity": "1"}]}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    result = subprocess.run([sys.executable, MAIN, "--batch", str(orders), "--output", str(output)],
+                            capture_output=True, text=True, check=True)
+    assert "Processed 2 orders (1 failed)" in result.stderr
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert results[0] == {"line": 1, "id": 1, "total": 2175.0}
+    assert results[1] == {"line": 2, "error": "Quantity must be an integer"}
+
+    result = subprocess.run([sys.executable, MAIN, "--batch", "-"], input=orders.read_text(encoding="utf-8"),
+                            capture_output=True, text=True, check=True)
+    assert len(result.stdout.splitlines()) == 2
+
+
+def test_startup_from_compiled_catalog(tmp_path):
+    catalog = tmp_path / "catalog.bin"
+    subprocess.run([sys.executable, MAIN, "--compile-catalog", str(catalog)], check=True)
+    assert catalog.exists()
+
+    orders = '{"items": [{"product": "Windows License", "quantity": 2}]}\n'
+    result = subprocess.run([sys.executable, MAIN, "--catalog", str(catalog), "--startup-report", "--batch", "-"],
+                            input=orders, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == {"line": 1, "total": 175.0}
+    report = result.stderr.splitlines()[0]
+    assert re.fullmatch(r"Startup: imports [\d.]+ms, catalog [\d.]+ms, store [\d.]+ms, total [\d.]+ms", report)
+
+
+def test_startup_phases(tmp_path):
+    catalog = str(tmp_path / "catalog.bin")
+    compile_catalog(best_buy_products(), catalog)
+    phases = []
+    store = startup(catalog, phases)
+    assert [str(product) for product in store.get_all_products()] == [
+        str(product) for product in initialize_best_buy().get_all_products()]
+    assert [name for name, _ in phases] == ["catalog", "store"]
+    assert startup_report([("imports", 0.001), ("catalog", 0.002)]) == (
+        "Startup: imports 1.00ms, catalog 2.00ms, total 3.00ms")
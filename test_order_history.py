@@ -0,0 +1,43 @@
+import pytest
+
+from order_history import OrderHistory
+from products import Product
+from promotion import ThirdOneFreePromotion
+from store import Store
+
+
+def test_record_and_lines():
+    history = OrderHistory()
+    product = Product("Test Product", 10, 50)
+    history.record(product, 2, 20, timestamp=100)
+    product.set_promotion(ThirdOneFreePromotion())
+    history.record(product, 3, 20, timestamp=200)
+    assert len(history) == 2
+    assert list(history.lines()) == [(100, "Test Product", 2, 20, None),
+                                     (200, "Test Product", 3, 20, "Third One Free!")]
+
+
+def test_units_sold_per_bucket():
+    history = OrderHistory(bucket_seconds=3600)
+    product = Product("Test Product", 10, 50)
+    history.record(product, 1, 10, timestamp=10)
+    history.record(product, 2, 20, timestamp=3599)
+    history.record(product, 4, 40, timestamp=7200)
+    history.record(Product("Other Product", 10, 50), 8, 80, timestamp=10)
+    assert history.units_sold("Test Product", 0, 10_000) == {0: 3, 7200: 4}
+    assert history.units_sold("Test Product", 3600, 10_000) == {7200: 4}
+    assert history.revenue("Test Product", 0, 3600 * 24 * 365) == {0: 30, 7200: 40}
+    assert history.units_sold("Unknown", 0, 10_000) == {}
+
+
+def test_invalid_bucket_seconds():
+    with pytest.raises(ValueError, match="Bucket seconds must be a positive integer"):
+        OrderHistory(bucket_seconds=0)
+
+
+def test_store_records_bought_lines(capsys):
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 5)
+    store = Store([product1, product2])
+    store.order([(product1, 2), (product2, 6)])
+    assert [line[1:4] for line in store.order_history.lines()] == [("Test Product 1", 2, 20)]
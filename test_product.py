@@ -220,6 +220,13 @@ def test_limited_product_buy_more_than_limit():
         product.buy(11)
 
 
+def test_limited_product_check_order_limit():
+    product = LimitedProduct("Test Product", 10, 50, 10)
+    product.check_order_limit(4, 6)
+    with pytest.raises(ValueError, match="Quantity must be less than or equal to 10"):
+        product.check_order_limit(5, 6)
+
+
 def test_limited_product_str():
     product = LimitedProduct("Test Product", 10, 5, 10)
     assert str(product) == "Test Product, Price: 10, Quantity: 5, Promotion: None, Limit: 10"
@@ -261,4 +268,62 @@ def test_comparing_products():
     assert (product1 == product2) == False
     assert (product1 == product3) == False
     assert (product1 < product3) == True
-    assert (product3 > product1) == True
\ No newline at end of file
+    assert (product3 > product1) == True
+
+
+def test_observer_is_notified_of_changes():
+    product = Product("Test Product", 10, 5)
+    changes = []
+    product.add_observer(lambda kind, changed, old, new: changes.append((kind, old, new)))
+    product.buy(5)
+    product.set_quantity(3)
+    product.activate()
+    assert changes == [("quantity_changed", 5, 0), ("deactivated", True, False),
+                       ("quantity_changed", 0, 3), ("activated", False, True)]
+
+
+def test_quote():
+    product = Product("Test Product", 10, 5)
+    assert product.quote(3) == 30
+    assert product.quantity == 5
+    with pytest.raises(ValueError, match="Quantity must be non-negative"):
+        product.quote(-1)
+
+
+def test_limited_product_quote_more_than_limit():
+    product = LimitedProduct("Test Product", 10, 50, 10)
+    with pytest.raises(ValueError, match="Quantity must be less than or equal to 10"):
+        product.quote(11)
+
+
+def test_bulk_from_trusted():
+    products = Product.bulk_from_trusted([("Test Product 1", 10, 5), ("Test Product 2", 20, 0)])
+    assert products == [Product("Test Product 1", 10, 5), Product("Test Product 2", 20, 0)]
+    products[0].buy(1)
+    assert products[0].quantity == 4
+
+
+def test_non_stocked_product_from_trusted():
+    product = NonStockedProduct.from_trusted("Test Product", 10)
+    assert str(product) == str(NonStockedProduct("Test Product", 10))
+    assert product.buy(5) == 50
+
+
+def test_limited_product_from_trusted():
+    product = LimitedProduct.from_trusted("Test Product", 10, 5, 2)
+    assert product == LimitedProduct("Test Product", 10, 5, 2)
+    with pytest.raises(ValueError, match="Quantity must be less than or equal to 2"):
+        product.buy(3)
+
+
+@pytest.mark.parametrize("product_type, fields", [
+    (Product, ("Test Product", 10, 5)),
+    (Product, ("Test Product", 10, 0)),
+    (NonStockedProduct, ("Test Product", 10)),
+    (LimitedProduct, ("Test Product", 10, 5, 2)),
+])
+def test_trusted_products_have_the_attributes_of_constructed_ones(product_type, fields):
+    trusted = product_type.from_trusted(*fields)
+    constructed = product_type(*fields)
+    assert type(trusted) is product_type
+    assert vars(trusted) == vars(constructed)
@@ -0,0 +1,73 @@
+import io
+import threading
+import time
+
+import pytest
+
+from products import Product
+from profiler import SamplingProfiler
+from store import Store
+
+
+def test_sample_tags_operation():
+    profiler = SamplingProfiler()
+    with profiler.operation("order"):
+        profiler.sample()
+    profiler.sample()
+    assert len(profiler.samples) == 1
+    stack = next(iter(profiler.samples))
+    assert stack.startswith("order;")
+    assert stack.endswith("profiler.py:sample")
+    assert "test_profiler.py:test_sample_tags_operation" in stack
+
+
+def test_samples_other_threads():
+    profiler = SamplingProfiler()
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        with profiler.operation("restock"):
+            started.set()
+            release.wait()
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    started.wait()
+    profiler.sample()
+    release.set()
+    thread.join()
+    assert list(profiler.samples) == [next(stack for stack in profiler.samples if stack.startswith("restock;"))]
+
+
+def test_max_stacks():
+    profiler = SamplingProfiler(max_stacks=1)
+    with profiler.operation("order"):
+        profiler.sample()
+        (lambda: profiler.sample())()
+    assert profiler.samples["order;[truncated]"] == 1
+
+
+def test_write_collapsed():
+    profiler = SamplingProfiler()
+    profiler.samples["order;store.py:order"] = 3
+    stream = io.StringIO()
+    profiler.write_collapsed(stream)
+    assert stream.getvalue() == "order;store.py:order 3\n"
+
+
+def test_store_profiling_toggle():
+    products = [Product(f"Test Product {index}", 10, 1_000_000) for index in range(300)]
+    store = Store(products)
+    profiler = store.enable_profiling(interval=0.001)
+    with pytest.raises(ValueError, match="Profiling is already enabled"):
+        store.enable_profiling()
+    deadline = time.time() + 5
+    while not profiler.samples and time.time() < deadline:
+        store.order([(products[-1], 1)])
+    assert store.disable_profiling() is profiler
+    assert not profiler.is_running()
+    assert all(stack.startswith("order;") for stack in profiler.samples)
+    assert store.profiler is None
+    with pytest.raises(ValueError, match="Profiling is not enabled"):
+        store.disable_profiling()
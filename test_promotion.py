@@ -102,4 +102,31 @@ class TestPercentDiscountPromotion:
 
     def test_init_with_negative_discount(self):
         with pytest.raises(ValueError, match="Discount must be non-negative"):
-            PercentDiscountPromotion(-10)
\ No newline at end of file
+            PercentDiscountPromotion(-10)
+
+
+class TestPromotionStats:
+    def test_buy_records_application(self):
+        product = Product("Test Product", 100, 100)
+        promotion = SecondHalfPricePromotion()
+        product.set_promotion(promotion)
+        product.buy(2)
+        product.buy(3)
+        assert promotion.get_stats() == {"promotion": "Second Half Price!", "applications": 2, "units": 5,
+                                         "gross": 500, "net": 400, "discount": 100}
+
+    def test_quote_does_not_record(self):
+        product = Product("Test Product", 100, 100)
+        promotion = PercentDiscountPromotion(10)
+        product.set_promotion(promotion)
+        product.quote(5)
+        promotion.apply_promotion(product, 5)
+        assert promotion.units == 0
+
+    def test_export_promotion_stats(self):
+        promotion1 = ThirdOneFreePromotion()
+        promotion2 = PercentDiscountPromotion(10)
+        promotion2.record_application(1, 100, 90)
+        stats = export_promotion_stats([promotion1, promotion2, promotion1])
+        assert [stat["promotion"] for stat in stats] == ["Third One Free!", "10% Discount!"]
+        assert stats[1]["discount"] == 10
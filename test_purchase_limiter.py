@@ -0,0 +1,72 @@
+import pytest
+
+from purchase_limiter import PurchaseLimiter
+from products import LimitedProduct
+
+
+def test_record_and_usage(clock):
+    limiter = PurchaseLimiter(60, buckets=6, clock=clock)
+    limiter.record("alice", "Shipping", 1)
+    limiter.record("alice", "Shipping", 2)
+    assert limiter.get_usage("alice", "Shipping") == 3
+    assert limiter.get_usage("bob", "Shipping") == 0
+
+
+def test_usage_slides_out_of_window(clock):
+    limiter = PurchaseLimiter(60, buckets=6, clock=clock)
+    limiter.record("alice", "Shipping", 1)
+    clock.now = 30
+    limiter.record("alice", "Shipping", 2)
+    clock.now = 65
+    assert limiter.get_usage("alice", "Shipping") == 2
+    clock.now = 200
+    assert limiter.get_usage("alice", "Shipping") == 0
+
+
+def test_check_over_limit(clock):
+    limiter = PurchaseLimiter(60, clock=clock)
+    limiter.record("alice", "Shipping", 1)
+    with pytest.raises(ValueError, match="Customer alice can buy at most 1 per 60 seconds"):
+        limiter.check("alice", "Shipping", 1, 1)
+
+
+def test_max_entries_only_evicts_expired_entries(clock):
+    limiter = PurchaseLimiter(60, max_entries=2, clock=clock)
+    limiter.record("alice", "Shipping", 1)
+    clock.now = 30
+    limiter.record("bob", "Shipping", 1)
+    with pytest.raises(ValueError, match="Too many customers are buying"):
+        limiter.check("carol", "Shipping", 1, 1)
+    limiter.check("alice", "Shipping", 0, 1)
+    clock.now = 65
+    limiter.check("carol", "Shipping", 1, 1)
+    limiter.record("carol", "Shipping", 1)
+    assert len(limiter) == 2
+    assert limiter.get_usage("alice", "Shipping") == 0
+    assert limiter.get_usage("bob", "Shipping") == 1
+    assert limiter.get_usage("carol", "Shipping") == 1
+
+
+def test_evicted_slots_are_reused(clock):
+    limiter = PurchaseLimiter(60, buckets=6, max_entries=1, clock=clock)
+    limiter.record("alice", "Shipping", 3)
+    clock.now = 120
+    limiter.record("bob", "Shipping", 1)
+    assert len(limiter.counts) == 6
+    assert limiter.get_usage("bob", "Shipping") == 1
+    assert limiter.get_usage("alice", "Shipping") == 0
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError, match="Window must be a positive number"):
+        PurchaseLimiter(0)
+
+
+def test_limited_product_with_limiter(clock):
+    product = LimitedProduct("Shipping", 10, 50, 2, limiter=PurchaseLimiter(60, clock=clock))
+    assert product.buy(2, "alice") == 20
+    with pytest.raises(ValueError, match="Customer alice can buy at most 2"):
+        product.buy(1, "alice")
+    assert product.buy(1, "bob") == 10
+    assert product.buy(2) == 20
+    assert product.quantity == 45
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from products import Product
+from promotion import PercentDiscountPromotion
+from repricing import RepricingScheduler
+from store import Store
+
+
+def make_store():
+    return Store([Product("Test Product 1", 10, 5),
+                  Product("Test Product 2", 20, 5),
+                  Product("Test Product 3", 30, 5)])
+
+
+def test_set_price():
+    product = Product("Test Product", 10, 5)
+    product.set_price(12.5)
+    assert product.get_price() == 12.5
+    with pytest.raises(ValueError, match="New price must be non-negative"):
+        product.set_price(-1)
+
+
+def test_find_by_price_band_follows_price_changes():
+    store = make_store()
+    assert [product.name for product in store.find_by_price_band(15, 30)] == ["Test Product 2", "Test Product 3"]
+    store.get_product("Test Product 1").set_price(25)
+    assert [product.name for product in store.find_by_price_band(15, 30)] == [
+        "Test Product 2", "Test Product 1", "Test Product 3"]
+
+
+def test_reprice_by_percent_and_price():
+    store = make_store()
+    batches = []
+    store.change_feed.subscribe(batches.append)
+    store.reprice(store.find_by_price_band(15, 30), percent=-10)
+    assert [product.price for product in store.products] == [10, 18, 27]
+    assert len(batches) == 1
+    store.reprice(store.find_by_names(["Test Product 1"]), price=5)
+    assert store.get_snapshot().products[0].price == 5
+
+
+def test_reprice_by_promotion():
+    store = make_store()
+    promotion = PercentDiscountPromotion(10)
+    store.get_product("Test Product 3").set_promotion(promotion)
+    store.reprice(store.find_by_promotion(promotion), price=1)
+    assert [product.price for product in store.products] == [10, 20, 1]
+
+
+def test_reprice_invalid():
+    store = make_store()
+    with pytest.raises(ValueError, match="Either price or percent must be given"):
+        store.reprice(store.products)
+    with pytest.raises(ValueError, match="Product does not exist in the store"):
+        store.reprice([Product("Test Product 4", 40, 5)], price=1)
+    with pytest.raises(ValueError, match="Product Test Product 4 does not exist in the store"):
+        store.find_by_names(["Test Product 4"])
+
+
+def test_scheduler_applies_due_changes_in_order(clock):
+    store = make_store()
+    scheduler = RepricingScheduler(store, clock)
+    scheduler.schedule(20, ["Test Product 1"], price=8)
+    scheduler.schedule(10, ["Test Product 1"], price=9)
+    cancelled = scheduler.schedule(5, ["Test Product 2"], price=1)
+    scheduler.cancel(cancelled)
+    assert scheduler.next_effective_time() == 10
+
+    assert scheduler.run_pending() == 0
+    clock.now = 10
+    assert scheduler.run_pending() == 1
+    assert store.get_product("Test Product 1").price == 9
+    clock.now = 30
+    assert scheduler.run_pending() == 1
+    assert store.get_product("Test Product 1").price == 8
+    assert store.get_product("Test Product 2").price == 20
+    assert scheduler.next_effective_time() is None
+
+
+def test_scheduler_rejects_invalid_changes(clock):
+    scheduler = RepricingScheduler(make_store(), clock)
+    with pytest.raises(ValueError, match="Price must be a non-negative number"):
+        scheduler.schedule(10, ["Test Product 1"], price=-1)
+    with pytest.raises(ValueError, match="Percent must be at least -100"):
+        scheduler.schedule(10, ["Test Product 1"], percent=-101)
+    with pytest.raises(ValueError, match="Product Test Product 4 does not exist in the store"):
+        scheduler.schedule(10, ["Test Product 1", "Test Product 4"], price=1)
+    assert scheduler.next_effective_time() is None
+
+
+def test_scheduler_logs_failed_changes(clock, caplog):
+    store = make_store()
+    scheduler = RepricingScheduler(store, clock)
+    scheduler.schedule(10, ["Test Product 1"], price=1)
+    store.remove_product(store.get_product("Test Product 1"))
+    clock.now = 10
+    assert scheduler.run_pending() == 1
+    assert "Error repricing Test Product 1" in caplog.text
+
+
+def test_scheduler_thread():
+    store = make_store()
+    scheduler = RepricingScheduler(store)
+    scheduler.start()
+    try:
+        scheduler.schedule(time.time() + 0.05, ["Test Product 2"], percent=50)
+        deadline = time.time() + 2
+        while store.get_product("Test Product 2").price != 30 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert store.get_product("Test Product 2").price == 30
@@ -0,0 +1,135 @@
+import http.client
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from catalog_artifact import compile_catalog
+from load_generator import run_load
+from main import best_buy_products
+from products import Product, NonStockedProduct
+from server import StoreServer
+from store import Store
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+
+@pytest.fixture
+def server():
+    store = Store([Product("Test Product 1", 10, 5), NonStockedProduct("Test Product 2", 20)])
+    server = StoreServer(store, port=0, workers=4)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.graceful_shutdown()
+    thread.join()
+
+
+def request(connection, method, path, body=None):
+    connection.request(method, path, None if body is None else json.dumps(body))
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_list_quote_and_order_on_one_connection(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    status, listing = request(connection, "GET", "/products")
+    assert status == 200
+    assert [product["name"] for product in listing["products"]] == ["Test Product 1", "Test Product 2"]
+
+    order = {"id": 7, "items": [{"product": "Test Product 1", "quantity": 2}]}
+    assert request(connection, "POST", "/quote", order) == (200, {"total": 20, "id": 7})
+    assert request(connection, "POST", "/order", order) == (200, {"id": 7, "total": 20})
+    assert server.store.get_product("Test Product 1").quantity == 3
+    connection.close()
+
+
+def test_orders_endpoint(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    status, results = request(connection, "POST", "/orders", [
+        {"items": [{"product": "Test Product 2", "quantity": 3}]},
+        {"items": [{"product": "Unknown", "quantity": 1}]},
+    ])
+    assert status == 200
+    assert results == [{"total": 60}, {"error": "Unknown product: Unknown"}]
+    connection.close()
+
+
+def test_errors(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    assert request(connection, "GET", "/missing")[0] == 404
+    connection.request("POST", "/order", "not json")
+    response = connection.getresponse()
+    assert response.status == 400
+    response.read()
+    connection.close()
+
+
+def test_load_generator(server):
+    report = run_load("127.0.0.1", server.server_address[1], clients=2, requests=10, order_ratio=0.5)
+    assert report["requests"] == 20
+    assert report["errors"] == 0
+
+
+def test_unexpected_errors_get_a_response(server, monkeypatch):
+    def failing_quote(shopping_list):
+        raise RuntimeError("quote failed")
+
+    monkeypatch.setattr(server.store, "quote", failing_quote)
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    order = {"items": [{"product": "Test Product 1", "quantity": 1}]}
+    assert request(connection, "POST", "/quote", order) == (500, {"error": "Internal server error"})
+    bad_order = {"items": [{"product": ["Test Product 1"], "quantity": "1"}]}
+    assert request(connection, "POST", "/order", bad_order) == (200, {"error": "Product must be a product name"})
+    connection.close()
+
+
+def test_waiting_connections_close_busy_keep_alive_connections():
+    server = StoreServer(Store([Product("Test Product 1", 10, 5)]), port=0, workers=1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        first = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        assert request(first, "GET", "/products")[0] == 200
+        second = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        second.connect()
+        deadline = time.monotonic() + 5
+        while not server.saturated and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.saturated
+        first.request("GET", "/products")
+        response = first.getresponse()
+        assert response.getheader("Connection") == "close"
+        response.read()
+        assert request(second, "GET", "/products")[0] == 200
+        first.close()
+        second.close()
+    finally:
+        server.graceful_shutdown()
+        thread.join()
+
+
+def test_main_serves_a_compiled_catalog(tmp_path):
+    catalog = str(tmp_path / "catalog.bin")
+    compile_catalog(best_buy_products(), catalog)
+    process = subprocess.Popen([sys.executable, SERVER, "--port", "0", "--catalog", catalog, "--startup-report"],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        report = process.stderr.readline().strip()
+        assert re.fullmatch(r"Startup: imports [\d.]+ms, catalog [\d.]+ms, store [\d.]+ms, total [\d.]+ms", report)
+        port = int(process.stdout.readline().rsplit(":", 1)[1])
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        status, result = request(connection, "GET", "/products")
+        assert status == 200
+        assert [product["name"] for product in result["products"]] == [
+            product.name for product in best_buy_products()]
+        connection.close()
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.communicate(timeout=10)
@@ -0,0 +1,37 @@
+from collections import Counter
+
+from products import NonStockedProduct, LimitedProduct
+from simulate import build_catalog, generate_orders, replay_shard, simulate
+
+
+def test_build_catalog_has_all_product_types():
+    products = build_catalog(200, 10)
+    assert len(products) == 200
+    assert any(isinstance(product, NonStockedProduct) for product in products)
+    assert any(isinstance(product, LimitedProduct) for product in products)
+    assert any(product.promotion is not None for product in products)
+
+
+def test_generate_orders_is_skewed():
+    orders = generate_orders(100, 2000, 3, skew=1.5)
+    counts = Counter(index for order in orders for index, _ in order)
+    assert counts.most_common(1)[0][0] == 0
+    assert counts[0] > 10 * counts[50]
+
+
+def test_simulate_reports():
+    report = simulate(100, 200, 3, skew=1.0, workers=2, stock=20)
+    assert report["orders"] == 200
+    assert report["p50_ms"] <= report["p99_ms"] <= report["max_ms"]
+    assert report["hot_skus"][0][0] == "SKU 0"
+    assert report["failed_lines"] > 0
+    assert report["seconds"] > 0 and report["setup_seconds"] > 0
+    assert report["orders_per_second"] == report["orders"] / report["seconds"]
+
+
+def test_replay_shard_times_only_the_replay(capsys):
+    orders = generate_orders(50, 20, 3, skew=1.0)
+    result = replay_shard((50, 1, 0, orders))
+    assert result["seconds"] >= sum(result["latencies"])
+    assert sum(result["requested"].values()) == sum(len(order) for order in orders)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from change_feed import PROMOTION_CHANGED, LIMIT_CHANGED
+from products import Product, LimitedProduct, NonStockedProduct
+from promotion import PercentDiscountPromotion
+from snapshot import CHUNK_SIZE
+from store import Store
+
+
+def test_snapshot_copies_products():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = LimitedProduct("Test Product 2", 20, 5, 1)
+    store = Store([product1, product2])
+    snapshot = store.get_snapshot()
+    assert snapshot.version == 1
+    assert [str(product) for product in snapshot] == [str(product1), str(product2)]
+    assert snapshot.get_total_quantity() == 10
+
+
+def test_snapshot_is_immutable():
+    store = Store([Product("Test Product 1", 10, 5)])
+    snapshot = store.get_snapshot()
+    with pytest.raises(AttributeError):
+        snapshot.products[0].quantity = 1
+    with pytest.raises(AttributeError):
+        snapshot.version = 2
+
+
+def test_order_publishes_new_version():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 5)
+    store = Store([product1, product2])
+    before = store.get_snapshot()
+    store.order([(product1, 5)])
+    after = store.get_snapshot()
+    assert after.version == before.version + 1
+    assert before.products[0].quantity == 5
+    assert after.products[0].quantity == 0
+    assert after.get_all_products() == [after.products[1]]
+    assert after.get_total_quantity() == 5
+    # unchanged products are shared between versions
+    assert after.products[1] is before.products[1]
+
+
+def test_direct_product_changes_are_picked_up():
+    product1 = Product("Test Product 1", 10, 5)
+    store = Store([product1])
+    product1.set_quantity(7)
+    assert store.get_snapshot().get_total_quantity() == 7
+
+
+def test_promotion_and_limit_changes_are_picked_up():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = LimitedProduct("Test Product 2", 20, 5, 1)
+    store = Store([product1, product2])
+    store.get_snapshot()
+    discount = PercentDiscountPromotion(30)
+    product1.set_promotion(discount)
+    product2.set_limit(3)
+    snapshot = store.get_snapshot()
+    assert snapshot.products[0].promotion is discount
+    assert snapshot.products[1].limit == 3
+    assert [event.kind for event in store.change_feed.events_since(0)] == [PROMOTION_CHANGED, LIMIT_CHANGED]
+
+
+def test_add_and_remove_product():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = NonStockedProduct("Test Product 2", 20)
+    store = Store([product1])
+    first = store.get_snapshot()
+    store.add_product(product2)
+    assert [product.name for product in store.get_snapshot()] == ["Test Product 1", "Test Product 2"]
+    assert str(store.get_snapshot().products[1]) == str(product2)
+    store.remove_product(product1)
+    snapshot = store.get_snapshot()
+    assert [product.name for product in snapshot] == ["Test Product 2"]
+    assert len(first) == 1
+
+
+def test_reader_does_not_wait_for_writer():
+    product1 = Product("Test Product 1", 10, 5)
+    store = Store([product1])
+    store.lock.acquire()
+    try:
+        product1.set_quantity(1)
+        result = []
+        reader = threading.Thread(target=lambda: result.append(store.get_snapshot()))
+        reader.start()
+        reader.join(timeout=1)
+        assert result[0].get_total_quantity() == 5
+    finally:
+        store.lock.release()
+    assert store.get_snapshot().get_total_quantity() == 1
+
+
+def test_publish_copies_only_changed_chunks():
+    products = Product.bulk_from_trusted([(f"Test Product {index}", 10, 5) for index in range(3 * CHUNK_SIZE + 1)])
+    store = Store(products)
+    before = store.get_snapshot()
+    store.order([(products[CHUNK_SIZE + 1], 2), (products[-1], 1)])
+    after = store.get_snapshot()
+    assert after.products.chunks[0] is before.products.chunks[0]
+    assert after.products.chunks[2] is before.products.chunks[2]
+    assert after.products.chunks[1] is not before.products.chunks[1]
+    assert after.products[CHUNK_SIZE + 1].quantity == 3
+    assert after.products[-1].quantity == 4
+    assert len(after) == 3 * CHUNK_SIZE + 1
+    assert [product.name for product in after] == [product.name for product in products]
+    assert after.get_total_quantity() == before.get_total_quantity() - 3
+    with pytest.raises(IndexError):
+        after.products[3 * CHUNK_SIZE + 1]
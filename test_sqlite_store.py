@@ -0,0 +1,93 @@
+import pytest
+
+from order_requests import execute_order
+from products import Product, NonStockedProduct, LimitedProduct
+from promotion import SecondHalfPricePromotion
+from sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    product = Product("Test Product 1", 10, 5)
+    product.set_promotion(SecondHalfPricePromotion())
+    store.add_products([product, Product("Test Product 2", 20, 5), NonStockedProduct("Test Product 3", 30),
+                        LimitedProduct("Test Product 4", 40, 5, 1)])
+    yield store
+    store.close()
+
+
+def test_journal_mode_is_wal(store):
+    assert store.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_order(store):
+    products = store.get_all_products()
+    assert store.order([(products[0], 2), (products[2], 3)]) == 105
+    assert store.get_product("Test Product 1").quantity == 3
+    assert store.get_total_quantity() == 13
+
+
+def test_order_sells_out(store):
+    assert store.order([(Product("Test Product 2", 20, 5), 5)]) == 100
+    assert not store.get_product("Test Product 2").is_active()
+    with pytest.raises(ValueError, match="Product is not active"):
+        store.order([(Product("Test Product 2", 20, 5), 1)])
+
+
+def test_order_line_errors(store, capsys):
+    limited = store.get_product("Test Product 4")
+    assert store.order([(limited, 1), (limited, 1), (store.get_product("Test Product 2"), 6)]) == 40
+    printed = capsys.readouterr().out
+    assert "Quantity must be less than or equal to 1" in printed
+    assert "Not enough quantity in stock" in printed
+    assert store.get_product("Test Product 4").quantity == 4
+
+
+def test_order_unknown_product_rolls_back_earlier_lines(store):
+    with pytest.raises(ValueError, match="Product does not exist in the store"):
+        store.order([(Product("Test Product 2", 20, 5), 1), (Product("Test Product 5", 20, 5), 1)])
+    assert store.get_product("Test Product 2").quantity == 5
+    assert len(store.order_history) == 0
+
+    failures = []
+    assert store.order([(Product("Test Product 2", 20, 5), 1), (Product("Test Product 5", 20, 5), 1)],
+                       failures=failures) == 20
+    assert [error for _, error in failures] == ["Product does not exist in the store"]
+    assert store.get_product("Test Product 2").quantity == 4
+
+
+def test_any_error_rolls_back_and_records_nothing(store):
+    with pytest.raises(TypeError):
+        store.order([(Product("Test Product 1", 10, 5), 2), None])
+    assert not store.connection.in_transaction
+    assert store.get_product("Test Product 1").quantity == 5
+    assert len(store.order_history) == 0
+    assert store.get_promotion_stats()[0]["applications"] == 0
+
+
+def test_add_and_remove_product(store):
+    with pytest.raises(ValueError, match="Product already exists in the store"):
+        store.add_product(Product("Test Product 1", 10, 5))
+    with pytest.raises(ValueError, match="Product already exists in the store"):
+        store.add_products([Product("Test Product 5", 10, 5), Product("Test Product 1", 10, 5)])
+    assert "Test Product 5" not in store
+    store.remove_product(Product("Test Product 1", 10, 5))
+    assert "Test Product 1" not in store
+    with pytest.raises(ValueError, match="Product does not exist in the store"):
+        store.remove_product(Product("Test Product 1", 10, 5))
+
+
+def test_quote(store):
+    assert store.quote([(Product("Test Product 1", 10, 5), 2)]) == 15
+    assert store.get_product("Test Product 1").quantity == 5
+
+
+def test_execute_order_records_history_and_promotion_stats(store):
+    result = execute_order(store, {"customer": "alice", "items": [{"product": "Test Product 1", "quantity": 2},
+                                                                 {"product": "Test Product 4", "quantity": 2}]})
+    assert result == {"total": 15, "warnings": ["Error buying Test Product 4, Price: 40, Quantity: 5, Promotion: None, "
+                                                "Limit: 1: Quantity must be less than or equal to 1"]}
+    assert [line[1:4] for line in store.order_history.lines()] == [("Test Product 1", 2, 15)]
+    stats = store.get_promotion_stats()
+    assert [(stat["applications"], stat["units"], stat["discount"]) for stat in stats] == [(1, 2, 5)]
@@ -0,0 +1,81 @@
+import pytest
+
+from products import Product, NonStockedProduct
+from stock_alerts import LowStockMonitor
+from store import Store
+
+
+def test_alert_fires_on_crossing():
+    alerts = []
+    monitor = LowStockMonitor(lambda product, threshold, quantity: alerts.append((product.name, threshold, quantity)))
+    product = Product("Test Product", 10, 20)
+    monitor.watch(product, 5)
+    product.buy(10)
+    assert alerts == []
+    product.buy(6)
+    assert alerts == [("Test Product", 5, 4)]
+    product.buy(1)
+    assert len(alerts) == 1
+    product.set_quantity(10)
+    product.set_quantity(5)
+    assert alerts[-1] == ("Test Product", 5, 5)
+
+
+def test_alert_fires_during_store_order():
+    alerts = []
+    monitor = LowStockMonitor(lambda product, threshold, quantity: alerts.append(product.name))
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 10, 5)
+    store = Store([product1, product2])
+    monitor.watch(product1, 2)
+    store.order([(product1, 3), (product2, 5)])
+    assert alerts == ["Test Product 1"]
+
+
+def test_lowest_headroom_and_below_threshold():
+    monitor = LowStockMonitor(lambda product, threshold, quantity: None)
+    products = [Product(f"Test Product {index}", 10, 10) for index in range(4)]
+    for index, product in enumerate(products):
+        monitor.watch(product, index * 3)
+    products[0].set_quantity(1)
+    assert sorted((headroom, product.name) for headroom, product in monitor.lowest_headroom(2)) == [
+        (1, "Test Product 0"), (1, "Test Product 3")]
+    assert monitor.below_threshold() == []
+    products[2].set_quantity(6)
+    assert monitor.below_threshold() == [products[2]]
+
+
+def test_unwatch():
+    alerts = []
+    monitor = LowStockMonitor(lambda product, threshold, quantity: alerts.append(product))
+    product = Product("Test Product", 10, 10)
+    monitor.watch(product, 5)
+    monitor.unwatch(product)
+    product.set_quantity(1)
+    assert alerts == []
+    assert monitor.lowest_headroom(1) == []
+    with pytest.raises(ValueError, match="Product is not watched"):
+        monitor.unwatch(product)
+
+
+def test_watch_invalid():
+    monitor = LowStockMonitor(lambda product, threshold, quantity: None)
+    with pytest.raises(ValueError, match="Product must be a stocked product"):
+        monitor.watch(NonStockedProduct("Test Product", 10), 1)
+    with pytest.raises(ValueError, match="Threshold must be non-negative"):
+        monitor.watch(Product("Test Product", 10, 10), -1)
+
+
+def test_failing_callback_does_not_break_orders(caplog):
+    def failing(product, threshold, quantity):
+        raise ValueError("callback failed")
+
+    product = Product("Test Product 1", 10, 5)
+    store = Store([product])
+    monitor = LowStockMonitor(failing)
+    monitor.watch(product, 2)
+    assert store.order([(product, 4)]) == 40
+    assert product.quantity == 1
+    assert len(store.order_history) == 1
+    assert monitor.below_threshold() == [product]
+    assert "Low stock callback failed for Test Product 1" in caplog.text
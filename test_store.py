@@ -1,7 +1,11 @@
+import gc
+
 import pytest
 
 from store import Store
 from products import Product, NonStockedProduct, LimitedProduct
+from promotion import PercentDiscountPromotion
+from purchase_limiter import PurchaseLimiter
 
 
 # test dependency is not working here
@@ -153,4 +157,118 @@ def test_in_operator():
     store = Store([product1, product2])
     assert product1 in store
     assert product2 in store
-    assert Product("Test Product 3", 30, 5) not in store
\ No newline at end of file
+    assert Product("Test Product 3", 30, 5) not in store
+
+
+def test_order_limited_product_duplicate_lines(capsys):
+    product = LimitedProduct("Test Product", 20, 15, 1)
+    store = Store([product])
+    assert store.order([(product, 1), (product, 1)]) == 20
+    assert product.quantity == 14
+    printed = capsys.readouterr()
+    assert "Quantity must be less than or equal to 1" in printed.out
+
+
+def test_order_limited_product_per_customer(capsys):
+    product = LimitedProduct("Test Product", 20, 15, 1, limiter=PurchaseLimiter(3600))
+    store = Store([product])
+    assert store.order([(product, 1)], customer="alice") == 20
+    assert store.order([(product, 1)], customer="alice") == 0
+    assert store.order([(product, 1)], customer="bob") == 20
+    printed = capsys.readouterr()
+    assert "Customer alice can buy at most 1" in printed.out
+
+
+def test_get_product():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 5)
+    store = Store([product1])
+    store.add_product(product2)
+    assert store.get_product("Test Product 1") is product1
+    assert store.get_product("Test Product 2") is product2
+    store.remove_product(product2)
+    assert store.get_product("Test Product 2") is None
+
+
+def test_quote():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 0)
+    store = Store([product1, product2])
+    assert store.quote([(product1, 2)]) == 20
+    assert product1.quantity == 5
+    with pytest.raises(ValueError, match="Product is not active"):
+        store.quote([(product2, 1)])
+
+
+def test_restock():
+    product1 = Product("Test Product 1", 10, 0)
+    product2 = Product("Test Product 2", 20, 5)
+    product3 = Product("Test Product 3", 30, 5)
+    product3.deactivate()
+    store = Store([product1, product2, product3])
+    batches = []
+    store.change_feed.subscribe(batches.append)
+    assert store.restock({"Test Product 1": 10, "Test Product 2": -5, "Test Product 3": 1}) == {
+        "Test Product 1": 10, "Test Product 2": 0, "Test Product 3": 6}
+    assert product1.is_active()
+    assert not product2.is_active()
+    assert not product3.is_active()
+    assert len(batches) == 1
+    assert store.get_snapshot().get_total_quantity() == 16
+
+
+def test_restock_without_reactivation():
+    product1 = Product("Test Product 1", 10, 0)
+    store = Store([product1])
+    store.restock({"Test Product 1": 10}, reactivate=False)
+    assert product1.quantity == 10
+    assert not product1.is_active()
+
+
+def test_restock_is_all_or_nothing():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = NonStockedProduct("Test Product 2", 20)
+    store = Store([product1, product2])
+    with pytest.raises(ValueError) as e:
+        store.restock({"Test Product 1": 5, "Test Product 2": 1, "Test Product 3": 1})
+    assert str(e.value) == ("Invalid restock: Test Product 2: cannot restock non stocked product; "
+                            "Test Product 3: product does not exist in the store")
+    assert product1.quantity == 5
+
+
+def test_store_without_validation():
+    products = Product.bulk_from_trusted([("Test Product 1", 10, 5), ("Test Product 2", 20, 5)])
+    store = Store(products, validate=False)
+    assert store.order([(products[0], 1)]) == 10
+    assert store.get_total_quantity() == 9
+
+
+def test_get_promotion_stats():
+    promotion = PercentDiscountPromotion(50)
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = NonStockedProduct("Test Product 2", 20)
+    product1.set_promotion(promotion)
+    product2.set_promotion(promotion)
+    store = Store([product1, product2])
+    store.order([(product1, 2), (product2, 1)])
+    assert store.get_promotion_stats() == [{"promotion": "50% Discount!", "applications": 2, "units": 3,
+                                            "gross": 40, "net": 20, "discount": 20}]
+
+
+def test_closed_and_dropped_stores_stop_observing():
+    product1 = Product("Test Product 1", 10, 5)
+    product2 = Product("Test Product 2", 20, 5)
+    for _ in range(3):
+        Store([product2])
+    store1 = Store([product1])
+    store3 = store1 + Store([product2])
+    assert len(product1.observers) == 2
+    assert len(product2.observers) == 1
+    del store3
+    gc.collect()
+    assert len(product1.observers) == 1
+    assert len(product2.observers) == 0
+    store1.close()
+    assert product1.observers == []
+    product1.set_quantity(3)
+    assert store1.get_snapshot().get_total_quantity() == 5
@@ -0,0 +1,118 @@
+import pytest
+
+from products import Product, NonStockedProduct
+from store import Store
+from warehouse import Warehouse, WarehouseStock
+
+
+def make_stock():
+    product = Product("Test Product", 10, 0)
+    near = Warehouse("Near", 1)
+    far = Warehouse("Far", 5)
+    stock = WarehouseStock(product)
+    stock.set_stock(far, 10)
+    stock.set_stock(near, 3)
+    return product, near, far, stock
+
+
+def test_set_stock_updates_product_quantity():
+    product, near, far, stock = make_stock()
+    assert product.quantity == 13
+    stock.set_stock(far, 4)
+    assert product.quantity == 7
+    assert stock.get_stock(far) == 4
+
+
+def test_allocate_cheapest_first():
+    product, near, far, stock = make_stock()
+    assert stock.allocate(5) == [(near, 3), (far, 2)]
+    assert stock.get_stock(near) == 0
+    assert stock.allocate(1) == [(far, 1)]
+    with pytest.raises(ValueError, match="Not enough quantity in warehouses"):
+        stock.allocate(8)
+
+
+def test_release():
+    product, near, far, stock = make_stock()
+    allocation = stock.allocate(4)
+    stock.release(allocation)
+    assert stock.get_stock(near) == 3
+    assert stock.get_stock(far) == 10
+    assert stock.allocate(3) == [(near, 3)]
+
+
+def test_non_stocked_product():
+    with pytest.raises(ValueError, match="Product must be a stocked product"):
+        WarehouseStock(NonStockedProduct("Test Product", 10))
+
+
+def test_store_order_allocates(capsys):
+    product, near, far, stock = make_stock()
+    store = Store([product])
+    store.set_warehouse_stock(stock)
+    allocations = []
+    assert store.order([(product, 4)], allocations=allocations) == 40
+    assert allocations == [(product, [(near, 3), (far, 1)])]
+    assert product.quantity == 9
+    assert store.order([(product, 10)]) == 0
+    assert stock.get_stock(far) == 9
+    assert "Not enough quantity in warehouses" in capsys.readouterr().out
+
+
+def test_store_rejects_restock_of_warehouse_stock():
+    product, near, far, stock = make_stock()
+    store = Store([product])
+    store.set_warehouse_stock(stock)
+    with pytest.raises(ValueError, match="restock warehouse stock per warehouse"):
+        store.restock({"Test Product": 1})
+
+
+def test_current_quantity_is_kept():
+    product = Product("Test Product", 10, 5)
+    with pytest.raises(ValueError, match="warehouse for the current quantity"):
+        WarehouseStock(product)
+    near = Warehouse("Near", 1)
+    stock = WarehouseStock(product, near)
+    store = Store([product])
+    store.set_warehouse_stock(stock)
+    assert store.order([(product, 5)]) == 50
+    assert stock.get_stock(near) == 0
+
+
+def test_set_stock_reactivates_sold_out_product():
+    product, near, far, stock = make_stock()
+    assert product.is_active()
+    stock.set_stock(near, 0)
+    stock.set_stock(far, 0)
+    assert not product.is_active()
+    stock.set_stock(far, 10)
+    assert product.is_active()
+    store = Store([product])
+    store.set_warehouse_stock(stock)
+    assert store.order([(product, 1)]) == 10
+
+    product.deactivate()
+    store.set_stock(product, near, 2)
+    assert not product.is_active()
+
+
+def test_store_set_stock():
+    product, near, far, stock = make_stock()
+    store = Store([product])
+    with pytest.raises(ValueError, match="not stocked per warehouse"):
+        store.set_stock(product, near, 1)
+    store.set_warehouse_stock(stock)
+    store.get_snapshot()
+    store.set_stock(product, near, 1)
+    assert stock.get_stock(near) == 1
+    assert store.get_snapshot().get_total_quantity() == 11
+
+
+def test_added_stores_keep_warehouse_stock():
+    product, near, far, stock = make_stock()
+    store = Store([product])
+    store.set_warehouse_stock(stock)
+    combined = Store([Product("Other Product", 10, 5)]) + store
+    assert combined.get_warehouse_stock(product) is stock
+    assert combined.order([(product, 4)]) == 40
+    assert stock.get_stock(near) == 0
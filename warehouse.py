@@ -0,0 +1,121 @@
+import heapq
+import itertools
+
+from products import Product, NonStockedProduct
+
+
+class Warehouse:
+    def __init__(self, name: str, cost: float) -> None:
+        """
+        Constructor for the Warehouse class
+        :param name: str: Name of the warehouse
+        :param cost: float: Cost of fulfilling from this warehouse, cheaper warehouses are used first
+        """
+        if not isinstance(name, str) or len(name) == 0:
+            raise ValueError("Name must be a non empty string")
+        if not isinstance(cost, (int, float)):
+            raise ValueError("Cost must be a number")
+
+        self.name = name
+        self.cost = cost
+
+    def __str__(self) -> str:
+        """ Returns the string representation of the warehouse """
+        return f"{self.name}, Cost: {self.cost}"
+
+
+class WarehouseStock:
+    _order = itertools.count() # tie breaker for warehouses with the same cost
+
+    def __init__(self, product: Product, warehouse: Warehouse = None) -> None:
+        """
+        Constructor for the WarehouseStock class
+        Stock of one product per warehouse. The quantity of the product is kept equal to the sum over all
+        warehouses, and the warehouses with stock are kept in a heap ordered by cost, so allocating an order
+        line only touches the warehouses it takes stock from
+        :param product: Product: The product the stock belongs to
+        :param warehouse: Warehouse: Warehouse holding the current quantity of the product, only needed if the
+        product has stock
+        """
+        if not isinstance(product, Product) or isinstance(product, NonStockedProduct):
+            raise ValueError("Product must be a stocked product")
+        if product.quantity > 0 and not isinstance(warehouse, Warehouse):
+            raise ValueError("A warehouse for the current quantity of the product is required")
+
+        self.product = product
+        self.stock = {} # warehouse -> quantity
+        self.heap = [] # (cost, tie breaker, warehouse) of warehouses that had stock when they were pushed
+        self.in_heap = set() # ids of the warehouses in the heap
+        self.total = product.quantity
+        if product.quantity > 0:
+            self.stock[warehouse] = product.quantity
+            self._push(warehouse)
+
+    def _push(self, warehouse: Warehouse) -> None:
+        """ Puts the warehouse into the heap unless it is already in it """
+        if id(warehouse) not in self.in_heap:
+            heapq.heappush(self.heap, (warehouse.cost, next(self._order), warehouse))
+            self.in_heap.add(id(warehouse))
+
+    def set_stock(self, warehouse: Warehouse, quantity: int) -> None:
+        """
+        Sets the stock of the product in a warehouse and updates the quantity of the product
+        Like Store.restock, a product that was sold out is activated again when it gets stock, a product
+        deactivated while it still had stock stays inactive. Once the stock is set on a store use Store.set_stock,
+        which holds the lock of the store
+        """
+        if not isinstance(warehouse, Warehouse):
+            raise ValueError("Warehouse must be of type Warehouse")
+        if not isinstance(quantity, int):
+            raise ValueError("Quantity must be an integer")
+        if quantity < 0:
+            raise ValueError("Quantity must be non-negative")
+
+        sold_out = self.product.quantity == 0
+        self.total += quantity - self.stock.get(warehouse, 0)
+        self.stock[warehouse] = quantity
+        if quantity > 0:
+            self._push(warehouse)
+        self.product.set_quantity(self.total)
+        if sold_out and self.total > 0:
+            self.product.activate()
+
+    def get_stock(self, warehouse: Warehouse) -> int:
+        """ Returns the stock of the product in a warehouse """
+        return self.stock.get(warehouse, 0)
+
+    def allocate(self, quantity: int) -> list[tuple[Warehouse, int]]:
+        """
+        Takes quantity units from the cheapest warehouses, without changing the quantity of the product
+        :param quantity: int: Number of units to take
+        :return: list[tuple[Warehouse, int]]: The warehouses and the number of units taken from each
+        """
+        if not isinstance(quantity, int):
+            raise ValueError("Quantity must be an integer")
+        if quantity < 0:
+            raise ValueError("Quantity must be non-negative")
+        if quantity > self.total:
+            raise ValueError("Not enough quantity in warehouses")
+
+        allocation = []
+        remaining = quantity
+        while remaining > 0:
+            cost, order, warehouse = self.heap[0]
+            available = self.stock[warehouse]
+            taken = min(available, remaining)
+            if taken > 0:
+                allocation.append((warehouse, taken))
+                self.stock[warehouse] = available - taken
+                remaining -= taken
+            if self.stock[warehouse] == 0:
+                heapq.heappop(self.heap)
+                self.in_heap.discard(id(warehouse))
+        self.total -= quantity
+        return allocation
+
+    def release(self, allocation: list[tuple[Warehouse, int]]) -> None:
+        """ Gives the units of an allocation back to their warehouses """
+        for warehouse, quantity in allocation:
+            self.stock[warehouse] += quantity
+            self.total += quantity
+            self._push(warehouse)